@@ -0,0 +1,94 @@
+// Containers inspected by the visualizer benchmarks.
+//
+// Every container is a global filled with N elements, N being the first
+// command line argument; gdbBenchmark.py stops in bench_stop and prints
+// them.  Qt4 and Boost fixtures are compiled in with -DBENCH_QT4 and
+// -DBENCH_BOOST.
+
+#include <cstdio>
+#include <cstdlib>
+#include <deque>
+#include <list>
+#include <map>
+#include <set>
+#include <string>
+#include <unordered_map>
+#include <vector>
+
+#ifdef BENCH_QT4
+#include <QHash>
+#include <QList>
+#include <QMap>
+#include <QString>
+#include <QStringList>
+#endif
+
+#ifdef BENCH_BOOST
+#include <boost/optional.hpp>
+#include <boost/range/iterator_range.hpp>
+#endif
+
+std::vector<int> g_vector_int;
+std::vector<double> g_vector_double;
+std::vector<std::string> g_vector_string;
+std::deque<int> g_deque_int;
+std::list<int> g_list_int;
+std::map<int, int> g_map_int;
+std::set<int> g_set_int;
+std::unordered_map<int, int> g_unordered_map_int;
+std::string g_string;
+
+#ifdef BENCH_QT4
+QList<int> g_qlist_int;
+QStringList g_qstringlist;
+QMap<int, int> g_qmap_int;
+QHash<int, int> g_qhash_int;
+QString g_qstring;
+#endif
+
+#ifdef BENCH_BOOST
+boost::iterator_range<int *> g_boost_range;
+boost::optional<int> g_boost_optional;
+#endif
+
+extern "C" void __attribute__((noinline)) bench_stop()
+{
+    asm volatile("");
+}
+
+int main(int argc, char **argv)
+{
+    const long n = argc > 1 ? std::atol(argv[1]) : 1000;
+
+    for (long i = 0; i < n; ++i) {
+        char text[32];
+        std::snprintf(text, sizeof text, "item %ld", i);
+
+        g_vector_int.push_back(int(i));
+        g_vector_double.push_back(i * 0.5);
+        g_vector_string.push_back(text);
+        g_deque_int.push_back(int(i));
+        g_list_int.push_back(int(i));
+        g_map_int[int(i)] = int(i);
+        g_set_int.insert(int(i));
+        g_unordered_map_int[int(i)] = int(i);
+        g_string += char('a' + i % 26);
+
+#ifdef BENCH_QT4
+        g_qlist_int.append(int(i));
+        g_qstringlist.append(QString::fromLatin1(text));
+        g_qmap_int.insert(int(i), int(i));
+        g_qhash_int.insert(int(i), int(i));
+        g_qstring += QChar('a' + i % 26);
+#endif
+    }
+
+#ifdef BENCH_BOOST
+    g_boost_range = boost::make_iterator_range(g_vector_int.data(),
+                                               g_vector_int.data() + g_vector_int.size());
+    g_boost_optional = int(n);
+#endif
+
+    bench_stop();
+    return 0;
+}
@@ -0,0 +1,144 @@
+# Visualizer timings, run inside GDB by runBenchmarks.py.
+
+# The printers are registered the way the IDE does it, from the C++
+# entries of Visualizers/visualizers.xml.  For every fixture variable the
+# script times the printer lookup, to_string and a full expansion of the
+# children, and appends one JSON object per variable to BENCH_OUTPUT.
+
+import gdb
+import json
+import os
+import sys
+import time
+import xml.etree.ElementTree
+
+VARIABLES = [
+    'g_vector_int', 'g_vector_double', 'g_vector_string', 'g_deque_int',
+    'g_list_int', 'g_map_int', 'g_set_int', 'g_unordered_map_int', 'g_string',
+    'g_qlist_int', 'g_qstringlist', 'g_qmap_int', 'g_qhash_int', 'g_qstring',
+    'g_boost_range', 'g_boost_optional' ]
+
+def register_printers (directory):
+    "Register the C++ visualizers listed in visualizers.xml."
+
+    sys.path.insert (0, directory)
+    root = xml.etree.ElementTree.parse (os.path.join (directory, 'visualizers.xml')).getroot ()
+    for visualizer in root.findall ('Visualizer'):
+        if visualizer.findtext ('Language') != 'cpp':
+            continue
+        module = __import__ (visualizer.findtext ('ModuleName'), fromlist = ['*'])
+        getattr (module, visualizer.findtext ('Registrator')) (None)
+
+def is_ours (printer):
+    "Return True if PRINTER comes from a module of the visualizers directory."
+
+    module = sys.modules.get (printer.__class__.__module__)
+    filename = getattr (module, '__file__', None)
+    if filename == None:
+        return False
+    directory = os.path.abspath (os.environ['BENCH_VISUALIZERS'])
+    return os.path.abspath (filename).startswith (directory + os.sep)
+
+def force (value):
+    "Make GDB fetch VALUE, as a front end displaying it would."
+
+    if isinstance (value, gdb.Value):
+        if hasattr (value, 'fetch_lazy'):
+            value.fetch_lazy ()
+        else:
+            str (value)
+
+def lookup (val):
+    return gdb.default_visualizer (val)
+
+def to_string (val):
+    result = gdb.default_visualizer (val).to_string ()
+    force (result)
+    return result
+
+def children (val):
+    printer = gdb.default_visualizer (val)
+    if not hasattr (printer, 'children'):
+        return 0
+    count = 0
+    for name, child in printer.children ():
+        force (child)
+        count = count + 1
+    return count
+
+def clear_caches ():
+    "Forget everything the printers cached, so the next run is cold."
+
+    from printerCore import registry
+    from printerCore import typecache
+    registry.registry.rebuild ()
+    typecache.clear ()
+
+def measure (function, val, repeat):
+    "Return (cold seconds, best warm seconds, result) of FUNCTION (VAL)."
+
+    clear_caches ()
+    start = time.time ()
+    result = function (val)
+    cold = time.time () - start
+    warm = None
+    for i in range (repeat):
+        start = time.time ()
+        function (val)
+        elapsed = time.time () - start
+        if warm == None or elapsed < warm:
+            warm = elapsed
+    return (cold, warm, result)
+
+def run ():
+    register_printers (os.environ['BENCH_VISUALIZERS'])
+
+    # Time the printers themselves, not the per-stop snapshot cache.
+    from printerCore import settings
+    settings.SNAPSHOT_CACHE = False
+
+    size = int (os.environ['BENCH_SIZE'])
+    repeat = int (os.environ.get ('BENCH_REPEAT', '3'))
+
+    gdb.execute ('break bench_stop')
+    gdb.execute ('run %d' % size)
+
+    output = open (os.environ['BENCH_OUTPUT'], 'a')
+    for name in VARIABLES:
+        record = { 'variable': name, 'size': size }
+        try:
+            val = gdb.parse_and_eval (name)
+        except gdb.error:
+            # Not compiled into this fixture.
+            continue
+        record['type'] = str (val.type)
+        try:
+            printer = gdb.default_visualizer (val)
+            if hasattr (printer, 'printer'):
+                # Unwrap printerCore.snapshot wrappers.
+                printer = printer.printer
+            # Printers found elsewhere (e.g. auto-loaded ones) have the
+            # same class names; the module tells them apart.
+            record['printer'] = printer.__class__.__name__
+            record['module'] = printer.__class__.__module__
+            if not is_ours (printer):
+                raise RuntimeError ('printed by %s.%s, not by the visualizers'
+                                    % (record['module'], record['printer']))
+            for phase, function in (('lookup', lookup), ('to_string', to_string),
+                                    ('children', children)):
+                cold, warm, result = measure (function, val, repeat)
+                record[phase] = { 'cold': cold, 'warm': warm }
+                if phase == 'children':
+                    record['children'] = result
+        except Exception:
+            record['error'] = str (sys.exc_info ()[1])
+        output.write (json.dumps (record) + '\n')
+    output.close ()
+
+try:
+    run ()
+finally:
+    try:
+        gdb.execute ('kill')
+    except gdb.error:
+        pass
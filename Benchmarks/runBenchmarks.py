@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""Measure how fast the GDB visualizers render large containers.
+
+Compiles fixtures.cpp, then runs GDB in batch mode on it once per
+container size with the visualizers of ../Visualizers loaded.  For every
+fixture variable, the time of the printer lookup, of to_string and of a
+full children expansion is recorded, cold (caches cleared) and warm
+(best of --repeat runs).  The results are written as one JSON document:
+
+    python runBenchmarks.py --sizes 1000,100000 --output bench_output.txt
+
+Qt4 fixtures need the QtCore development package (found through
+pkg-config) and --qt4; Boost fixtures need the Boost headers and --boost.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname (os.path.abspath (__file__))
+VISUALIZERS = os.path.join (os.path.dirname (HERE), 'Visualizers')
+
+def compile_fixtures (args, directory):
+    "Build fixtures.cpp into DIRECTORY and return the path of the binary."
+
+    binary = os.path.join (directory, 'fixtures')
+    command = [args.cxx, '-g', '-O0', '-std=c++11']
+    if args.qt4:
+        command += ['-DBENCH_QT4']
+        command += subprocess.check_output (['pkg-config', '--cflags', 'QtCore']).decode ().split ()
+    if args.boost:
+        command += ['-DBENCH_BOOST']
+    command += args.cxxflags.split ()
+    command += [os.path.join (HERE, 'fixtures.cpp'), '-o', binary]
+    if args.qt4:
+        command += subprocess.check_output (['pkg-config', '--libs', 'QtCore']).decode ().split ()
+    subprocess.check_call (command)
+    return binary
+
+def run_gdb (args, binary, size, output):
+    "Run gdbBenchmark.py on BINARY for containers of SIZE elements."
+
+    environment = dict (os.environ)
+    environment['BENCH_VISUALIZERS'] = VISUALIZERS
+    environment['BENCH_OUTPUT'] = output
+    environment['BENCH_SIZE'] = str (size)
+    environment['BENCH_REPEAT'] = str (args.repeat)
+    # The system's libstdc++ printers are auto-loaded for the libstdc++
+    # objfile and GDB tries them first: keep them out.
+    subprocess.check_call ([args.gdb, '-batch', '-nx',
+                            '-iex', 'set auto-load python-scripts off', '-x',
+                            os.path.join (HERE, 'gdbBenchmark.py'), binary],
+                           env = environment)
+
+def gdb_version (args):
+    return subprocess.check_output ([args.gdb, '--version']).decode ().splitlines ()[0]
+
+def main ():
+    parser = argparse.ArgumentParser (description = 'Benchmark the GDB visualizers.')
+    parser.add_argument ('--sizes', default = '1000,10000,100000,1000000',
+                         help = 'comma separated container sizes')
+    parser.add_argument ('--repeat', type = int, default = 3,
+                         help = 'warm runs per measurement')
+    parser.add_argument ('--gdb', default = 'gdb')
+    parser.add_argument ('--cxx', default = 'g++')
+    parser.add_argument ('--cxxflags', default = '',
+                         help = 'extra compiler flags, e.g. -D_GLIBCXX_USE_CXX11_ABI=0')
+    parser.add_argument ('--qt4', action = 'store_true', help = 'include the Qt4 fixtures')
+    parser.add_argument ('--boost', action = 'store_true', help = 'include the Boost fixtures')
+    parser.add_argument ('--output', help = 'JSON result file (default: standard output)')
+    args = parser.parse_args ()
+
+    directory = tempfile.mkdtemp (prefix = 'visualizer-bench-')
+    try:
+        binary = compile_fixtures (args, directory)
+        records = os.path.join (directory, 'records.jsonl')
+        for size in args.sizes.split (','):
+            run_gdb (args, binary, int (size), records)
+        results = []
+        if os.path.exists (records):
+            for line in open (records):
+                results.append (json.loads (line))
+    finally:
+        shutil.rmtree (directory)
+
+    document = { 'gdb': gdb_version (args), 'cxxflags': args.cxxflags, 'results': results }
+    text = json.dumps (document, indent = 1, sort_keys = True)
+    if args.output:
+        with open (args.output, 'w') as output:
+            output.write (text + '\n')
+    else:
+        sys.stdout.write (text + '\n')
+
+if __name__ == '__main__':
+    main ()
@@ -34,6 +34,11 @@
  
 import gdb
 import re
+
+from printerCore import paging
+from printerCore import registry
+from printerCore import table
+from printerCore import typecache
  
 class static:
     "Creates a 'static' method"
@@ -49,15 +54,17 @@ def register_pretty_printer(pretty_printer):
 @register_pretty_printer
 class BoostIteratorRange:
     "Pretty Printer for boost::iterator_range (Boost.Range)"
+    regex = re.compile('^boost::iterator_range<.*>$')
+
     @static
     def supports(typename):
-        return re.compile('^boost::iterator_range<.*>$').search(typename)
+        return BoostIteratorRange.regex.search(typename)
  
     class _iterator:
-        def __init__(self, begin, end):
+        def __init__(self, begin, end, count = 0):
             self.item = begin
             self.end = end
-            self.count = 0
+            self.count = count
  
         def __iter__(self):
             return self
@@ -82,8 +89,32 @@ class BoostIteratorRange:
         self.typename = typename
         self.value = value
  
+    def table(self):
+        "Return the elements as a printerCore.table.Table, or None if they are not records."
+        begin = self.value['m_Begin']
+        end = self.value['m_End']
+        if begin.type.strip_typedefs().code != gdb.TYPE_CODE_PTR:
+            return None
+        elttype = begin.type.strip_typedefs().target()
+        if not table.supports(elttype):
+            return None
+        return table.read(int(begin), elttype, int(end - begin))
+
     def children(self):
+        begin = self.value['m_Begin']
+        if begin.type.strip_typedefs().code == gdb.TYPE_CODE_PTR and \
+           table.applies(begin.type.strip_typedefs().target()):
+            try:
+                return self.table().children()
+            except gdb.error:
+                pass
         return self._iterator(self.value['m_Begin'], self.value['m_End'])
+
+    def children_range(self, offset, count):
+        begin = self.value['m_Begin']
+        end = self.value['m_End']
+        offset, count = paging.clamp(offset, count, int(end - begin))
+        return paging.Window(self._iterator(begin + offset, end, offset), count)
  
     def to_string(self):
         begin = self.value['m_Begin']
@@ -135,7 +166,7 @@ class BoostOptional:
             match = BoostOptional.regex.search(self.typename)
             if match:
                 try:
-                    membertype = gdb.lookup_type(match.group(1)).pointer()
+                    membertype = typecache.lookup_type(match.group(1)).pointer()
                     member = self.value['m_storage']['dummy_']['data'].address.cast(membertype)
                     return self._iterator(member, False)
                 except:
@@ -228,7 +259,7 @@ class BoostScopedPtr:
         match = BoostScopedPtr.regex.search(self.typename)
         if match:
             try:
-                membertype = gdb.lookup_type(match.group(3)).pointer()
+                membertype = typecache.lookup_type(match.group(3)).pointer()
                 member = self.value['px'].cast(membertype)
                 return self._iterator(member, False)
             except:
@@ -279,7 +310,7 @@ class BoostSharedPtr:
         match = BoostSharedPtr.regex.search(self.typename)
         if match:
             try:
-                membertype = gdb.lookup_type(match.group(3)).pointer()
+                membertype = typecache.lookup_type(match.group(3)).pointer()
                 member = self.value['px'].cast(membertype)
                 return self._iterator(member, False)
             except:
@@ -334,7 +365,7 @@ class BoostVariant:
         type = types[which]
         data = ''
         try:
-            ptrtype = gdb.lookup_type(type).pointer()
+            ptrtype = typecache.lookup_type(type).pointer()
             data = self.value['storage_']['data_']['buf'].address.cast(ptrtype)
         except:
             data = self.value['storage_']['data_']['buf']
@@ -379,7 +410,6 @@ def find_pretty_printer(value):
  
 def register_boost_printers(obj):
     "Register Boost Pretty Printers."
-    if obj == None:
-        obj = gdb
-    obj.pretty_printers.append(find_pretty_printer)
+    printers = [(pretty_printer.regex, pretty_printer) for pretty_printer in boost_pretty_printers]
+    registry.register(obj, 'boost', printers, with_typename = True)
  
\ No newline at end of file
@@ -31,6 +31,8 @@
 
 import gdb
 import re
+
+from printerCore import registry
  
 class CharArrayPrinter:
     "Pretty Printer for char arrays"
@@ -87,17 +89,19 @@ def find_pretty_printer(value):
     type = value.type.unqualified().strip_typedefs()
 
     if type.code == gdb.TYPE_CODE_ARRAY:
-        itemType = type.target().unqualified().strip_typedefs()
-        if ( itemType.code == gdb.TYPE_CODE_INT or itemType.code == gdb.TYPE_CODE_CHAR ) and itemType.sizeof == 1:
-            return CharArrayPrinter ( value )
-        else:
-            return None
+        return make_pretty_printer ( value, type )
     else:
        return None
 
+def make_pretty_printer(value, type):
+    "Create a printer for value of the stripped array type, if its items are chars"
+    itemType = type.target().unqualified().strip_typedefs()
+    if ( itemType.code == gdb.TYPE_CODE_INT or itemType.code == gdb.TYPE_CODE_CHAR ) and itemType.sizeof == 1:
+        return CharArrayPrinter ( value )
+    else:
+        return None
+
 def register_charArray_printers(obj):
     "Register char array printers."
-    if obj == None:
-        obj = gdb
-    obj.pretty_printers.append(find_pretty_printer)
+    registry.register(obj, 'charArrays', code_printers = { gdb.TYPE_CODE_ARRAY: make_pretty_printer })
  
\ No newline at end of file
@@ -7,6 +7,190 @@ from wingdbJavaDebugEngine import IVariableCallback
 
 # -----------------------------------------------------------------------------
 
+# JDI fields by ( ReferenceType, field name ), None for fields a type doesn't have
+fieldCache = {}
+
+def findField( referenceType, name ):
+    key = ( referenceType, name )
+    if key not in fieldCache:
+        fieldCache[ key ] = referenceType.fieldByName( name )
+    return fieldCache[ key ]
+
+def hasField( value, name ):
+    return findField( value.referenceType(), name ) is not None
+
+# reads a field without invoking any method of the debuggee
+def getFieldValue( value, name ):
+    field = findField( value.referenceType(), name )
+    if field is None:
+        return None
+    return value.getValue( field )
+
+def sameObject( first, second ):
+    if first is None or second is None:
+        return first is second
+    return first.uniqueID() == second.uniqueID()
+
+# -----------------------------------------------------------------------------
+
+# Where the last page of children of a container stopped, so that the next
+# page continues from there instead of starting over. Cursors are remote
+# iterators or local generators; they are keyed by ( VM, uniqueID, modCount ),
+# so a modified container starts afresh, and containers without a modCount
+# field are not cached. Object IDs are only unique within one VM and session,
+# hence the VM in the key. Remote iterators are kept from garbage collection
+# while cached.
+class KCursorCache:
+    def __init__( self, size ):
+        self.d_size = size
+        self.d_cursors = {}
+        self.d_order = []
+
+    def key( self, value ):
+        if not hasField( value, 'modCount' ):
+            return None
+        return ( value.virtualMachine(), value.uniqueID(),
+            getFieldValue( value, 'modCount' ).value() )
+
+    def keep( self, cursor ):
+        if isinstance( cursor, com.sun.jdi.ObjectReference ):
+            cursor.disableCollection()
+
+    def release( self, cursor ):
+        if isinstance( cursor, com.sun.jdi.ObjectReference ):
+            try:
+                cursor.enableCollection()
+            except ( com.sun.jdi.ObjectCollectedException, com.sun.jdi.VMDisconnectedException ):
+                pass
+
+    # removes and returns the cursor of key if it stopped at position
+    def take( self, key, position ):
+        if key is None or key not in self.d_cursors:
+            return None
+        storedPosition, cursor = self.d_cursors[ key ]
+        if storedPosition != position:
+            return None
+        del self.d_cursors[ key ]
+        self.d_order.remove( key )
+        return cursor
+
+    def put( self, key, position, cursor ):
+        if key is None:
+            self.release( cursor )
+            return
+        if key in self.d_cursors:
+            self.release( self.d_cursors.pop( key )[ 1 ] )
+            self.d_order.remove( key )
+        elif len( self.d_order ) >= self.d_size:
+            oldest = self.d_order.pop( 0 )
+            self.release( self.d_cursors.pop( oldest )[ 1 ] )
+        self.d_cursors[ key ] = ( position, cursor )
+        self.d_order.append( key )
+
+cursorCache = KCursorCache( 64 )
+
+# -----------------------------------------------------------------------------
+
+# Results of argument-less method invocations ( size, toString, getKey... ),
+# kept while the VM stays suspended: the watch window repaints the same values
+# many times per suspension. Entries are keyed by ( uniqueID, method,
+# suspension ). The engine hands no suspension counter to visualizers, so the
+# top frames of the suspended threads are sampled instead: JDI invalidates
+# them when their thread resumes, and checking that is local. Invocations
+# resume the threads too, so every invocation the visualizers make goes
+# through invoke, which samples the frames again afterwards. Evaluations of the
+# engine itself still look like a new suspension.
+class KInvocationCache:
+    def __init__( self, vm ):
+        self.d_vm = vm
+        self.d_suspension = 0
+        self.d_threads = []
+        self.d_frames = []
+        self.d_results = {}
+
+    def newSuspension( self ):
+        self.d_suspension += 1
+        self.d_results = {}
+        self.d_threads = []
+        self.d_frames = []
+        for thread in self.d_vm.allThreads():
+            try:
+                if thread.isSuspended() and thread.frameCount() > 0:
+                    self.d_threads.append( thread )
+                    self.d_frames.append( None )
+            except com.sun.jdi.IncompatibleThreadStateException:
+                pass
+        self.sampleFrames()
+
+    def isValid( self, frame ):
+        if frame is None:
+            return False
+        try:
+            frame.location()
+            return True
+        except com.sun.jdi.InvalidStackFrameException:
+            return False
+
+    # re-reads the top frames that an invocation invalidated; the invocation
+    # left their threads where they were
+    def sampleFrames( self ):
+        for index in range( 0, len( self.d_threads ) ):
+            if self.isValid( self.d_frames[ index ] ):
+                continue
+            try:
+                self.d_frames[ index ] = self.d_threads[ index ].frame( 0 )
+            except com.sun.jdi.IncompatibleThreadStateException:
+                self.d_threads = []
+                self.d_frames = []
+                return
+
+    def checkSuspension( self ):
+        if not self.d_frames:
+            # nothing to tell a resume by, so nothing is reused
+            self.newSuspension()
+            return
+        for frame in self.d_frames:
+            if not self.isValid( frame ):
+                self.newSuspension()
+                return
+
+    # invokes methodName on target, or on the visualized value if target is None
+    def invoke( self, varCallback, target, methodName, args ):
+        self.checkSuspension()
+        try:
+            if target is None:
+                return varCallback.invokeValue( methodName, args )
+            return varCallback.invokeByValue( target, methodName, args )
+        finally:
+            self.sampleFrames()
+
+    def invokeValue( self, value, varCallback, methodName ):
+        self.checkSuspension()
+        key = ( value.uniqueID(), methodName, self.d_suspension )
+        if key not in self.d_results:
+            self.d_results[ key ] = self.invoke( varCallback, None, methodName, [] )
+        return self.d_results[ key ]
+
+invocationCaches = {}
+
+def invocationCache( vm ):
+    if vm not in invocationCaches:
+        invocationCaches[ vm ] = KInvocationCache( vm )
+    return invocationCaches[ vm ]
+
+# invokes methodName on target ( the visualized value if None ); every
+# invocation of the visualizers goes through here or invokeCached
+def invoke( vm, varCallback, methodName, args, target = None ):
+    return invocationCache( vm ).invoke( varCallback, target, methodName, args )
+
+# invokes the argument-less method methodName on value, once per suspension
+def invokeCached( vm, value, varCallback, methodName ):
+    if value is None:
+        return invoke( vm, varCallback, methodName, [] )
+    return invocationCache( vm ).invokeValue( value, varCallback, methodName )
+
+# -----------------------------------------------------------------------------
+
 class KContainerBaseVisualizer( IVisualizer ):
     def __init__( self, vm ):
         self.d_vm = vm
@@ -18,10 +202,59 @@ class KContainerBaseVisualizer( IVisualizer ):
         return value.toString()
 
     def getChildrenCount( self, type, value, varCallback ):
-        rawChildrenCount = varCallback.invokeValue( 'size', [] )
+        rawChildrenCount = invokeCached( self.d_vm, value, varCallback, 'size' )
         childrenCount = rawChildrenCount.value()
         return childrenCount
 
+    # returns the bounds [ offset, end ) of the page of children starting at
+    # offset, with at most limit children ( all remaining ones if limit is None )
+    def getPage( self, childrenCount, offset, limit ):
+        offset = max( 0, min( offset, childrenCount ) )
+        end = childrenCount
+        if limit is not None:
+            end = min( end, offset + max( 0, limit ) )
+        return ( offset, end )
+
+    def addChild( self, varCallback, index, childValue, isFirst ):
+        if isFirst and childValue is not None:
+            varCallback.setElementType( childValue.type() )
+        label = '[' + str( index ) + ']'
+        varCallback.addElement( label, childValue )
+
+    # cursor-based containers override createCursor and nextValue
+    def createCursor( self, value, varCallback ):
+        return None
+
+    def nextValue( self, cursor, varCallback ):
+        return None
+
+    # yields ( index, child ) for the children [ offset, end ), continuing the
+    # cursor where the previous page stopped when possible; the cursor is only
+    # kept if children remain after end
+    def iterateFrom( self, value, varCallback, offset, end, childrenCount ):
+        key = cursorCache.key( value )
+        cursor = cursorCache.take( key, offset )
+        if cursor is None:
+            # invocations resume the VM, so a remote iterator is kept from
+            # collection during the walk too
+            cursor = self.createCursor( value, varCallback )
+            cursorCache.keep( cursor )
+            for skipped in range( 0, offset ):
+                self.nextValue( cursor, varCallback )
+        position = offset
+        try:
+            while position < end:
+                childValue = self.nextValue( cursor, varCallback )
+                yield ( position, childValue )
+                position += 1
+        except:
+            cursorCache.release( cursor )
+            raise
+        if end < childrenCount:
+            cursorCache.put( key, position, cursor )
+        else:
+            cursorCache.release( cursor )
+
 # -----------------------------------------------------------------------------
 
 class KStringConvertibleVisualizer( IVisualizer ):
@@ -32,7 +265,7 @@ class KStringConvertibleVisualizer( IVisualizer ):
         return False
 
     def getValueString( self, type, value, varCallback ):
-        str = varCallback.invokeValue( 'toString', [] )
+        str = invokeCached( self.d_vm, value, varCallback, 'toString' )
         return str.toString()
 
     def getChildrenCount( self, type, value, varCallback ):
@@ -48,7 +281,7 @@ class KFileVisualizer( IVisualizer ):
         return False
 
     def getValueString( self, type, value, varCallback ):
-        path = varCallback.invokeValue( 'getPath', [] )
+        path = invokeCached( self.d_vm, value, varCallback, 'getPath' )
         return path.toString()
 
     def getChildrenCount( self, type, value, varCallback ):
@@ -64,7 +297,7 @@ class KThrowableVisualizer( IVisualizer ):
         return False
 
     def getValueString( self, type, value, varCallback ):
-        message = varCallback.invokeValue( 'getMessage', [] )
+        message = invokeCached( self.d_vm, value, varCallback, 'getMessage' )
         return message.toString()
 
     def getChildrenCount( self, type, value, varCallback ):
@@ -73,28 +306,65 @@ class KThrowableVisualizer( IVisualizer ):
 # -----------------------------------------------------------------------------
 
 class KIndexedContainerVisualizer( KContainerBaseVisualizer ):
-    def generateChildren( self, type, value, varCallback, childrenCount ):
-        for index in range ( 0, childrenCount ):
+    def generateChildren( self, type, value, varCallback, childrenCount, offset = 0, limit = None ):
+        offset, end = self.getPage( childrenCount, offset, limit )
+        for index in range ( offset, end ):
             vmIndex = self.d_vm.mirrorOf( index )
-            childValue = varCallback.invokeValue( 'get', [ vmIndex ] )
-            if index == 0:
-                childType = childValue.type()
-                varCallback.setElementType( childType )
-            label = '[' + str( index ) + ']'
-            varCallback.addElement( label, childValue )
+            childValue = invoke( self.d_vm, varCallback, 'get', [ vmIndex ] )
+            self.addChild( varCallback, index, childValue, index == offset )
+
+# -----------------------------------------------------------------------------
+
+# ArrayList, Vector and Stack keep their elements in an Object[] field, so
+# the elements are read from the array itself: one getValues call for all of
+# them instead of one remote get() invocation per element. Unknown layouts
+# fall back to get().
+class KArrayBackedContainerVisualizer( KIndexedContainerVisualizer ):
+    d_arrayFieldName = 'elementData'
+    d_sizeFieldNames = [ 'size', 'elementCount' ]
+
+    def getChildrenCount( self, type, value, varCallback ):
+        size = None
+        for name in self.d_sizeFieldNames:
+            if hasField( value, name ):
+                size = getFieldValue( value, name )
+                break
+        if size is None:
+            return KIndexedContainerVisualizer.getChildrenCount( self, type, value, varCallback )
+        return size.value()
+
+    def generateChildren( self, type, value, varCallback, childrenCount, offset = 0, limit = None ):
+        if not hasField( value, self.d_arrayFieldName ):
+            KIndexedContainerVisualizer.generateChildren( self, type, value, varCallback,
+                childrenCount, offset, limit )
+            return
+        array = getFieldValue( value, self.d_arrayFieldName )
+        if array is None:
+            return
+        offset, end = self.getPage( min( childrenCount, array.length() ), offset, limit )
+        childValues = []
+        if end > offset:
+            childValues = array.getValues( offset, end - offset )
+        elementTypeSet = False
+        index = offset
+        for childValue in childValues:
+            self.addChild( varCallback, index, childValue, not elementTypeSet )
+            elementTypeSet = elementTypeSet or childValue is not None
+            index += 1
 
 # -----------------------------------------------------------------------------
 
 class KIterableContainerVisualizer( KContainerBaseVisualizer ):
-    def generateChildren( self, type, value, varCallback, childrenCount ):
-        iterator = varCallback.invokeValue( 'iterator', [] )
-        for index in range ( 0, childrenCount ):
-            childValue = varCallback.invokeByValue( iterator, 'next', [] )
-            if index == 0:
-                childType = childValue.type()
-                varCallback.setElementType( childType )
-            label = '[' + str( index ) + ']'
-            varCallback.addElement( label, childValue )
+    def createCursor( self, value, varCallback ):
+        return invoke( self.d_vm, varCallback, 'iterator', [] )
+
+    def nextValue( self, cursor, varCallback ):
+        return invoke( self.d_vm, varCallback, 'next', [], cursor )
+
+    def generateChildren( self, type, value, varCallback, childrenCount, offset = 0, limit = None ):
+        offset, end = self.getPage( childrenCount, offset, limit )
+        for index, childValue in self.iterateFrom( value, varCallback, offset, end, childrenCount ):
+            self.addChild( varCallback, index, childValue, index == offset )
 
 # -----------------------------------------------------------------------------
 
@@ -103,32 +373,133 @@ class KAssociativeContainerVisualizer( KContainerBaseVisualizer ):
         super( KAssociativeContainerVisualizer, self ).__init__( vm )
         self.d_storeEntryTypeCallback = storeEntryTypeCallback 
         
-    def generateChildren( self, type, value, varCallback, childrenCount ):
-        entrySet = varCallback.invokeValue( 'entrySet', [] )
-        entryIterator = varCallback.invokeByValue( entrySet, 'iterator', [] )
-        for index in range ( 0, childrenCount ):
-            childValue = varCallback.invokeByValue( entryIterator, 'next', [] )
-            if index == 0:
-                childType = childValue.type()
-                varCallback.setElementType( childType )
-                
-                if self.d_storeEntryTypeCallback:
-                    associativeTypeName = type.name()
-                    entryTypeName = childType.name()
-                    self.d_storeEntryTypeCallback.addSupportedEntryType( 
-                        associativeTypeName, entryTypeName )
-                    self.d_storeEntryTypeCallback = None
+    def storeEntryType( self, type, childValue, varCallback ):
+        childType = childValue.type()
+        varCallback.setElementType( childType )
+        
+        if self.d_storeEntryTypeCallback:
+            associativeTypeName = type.name()
+            entryTypeName = childType.name()
+            self.d_storeEntryTypeCallback.addSupportedEntryType( 
+                associativeTypeName, entryTypeName )
+            self.d_storeEntryTypeCallback = None
+
+    def createCursor( self, value, varCallback ):
+        entrySet = invoke( self.d_vm, varCallback, 'entrySet', [] )
+        return invoke( self.d_vm, varCallback, 'iterator', [], entrySet )
+
+    def nextValue( self, cursor, varCallback ):
+        return invoke( self.d_vm, varCallback, 'next', [], cursor )
+
+    def generateChildren( self, type, value, varCallback, childrenCount, offset = 0, limit = None ):
+        offset, end = self.getPage( childrenCount, offset, limit )
+        for index, childValue in self.iterateFrom( value, varCallback, offset, end, childrenCount ):
+            if index == offset:
+                self.storeEntryType( type, childValue, varCallback )
                     
             label = '[' + str( index ) + ']'
             varCallback.addElement( label, childValue )
 
 # -----------------------------------------------------------------------------
 
+# Maps of the JDK whose entries are reached through field reads only: no
+# method of the debuggee runs, and no thread has to be resumed.
+class KFieldWalkingMapVisualizer( KAssociativeContainerVisualizer ):
+    def getChildrenCount( self, type, value, varCallback ):
+        size = getFieldValue( value, 'size' )
+        if size is None:
+            return KAssociativeContainerVisualizer.getChildrenCount( self, type, value, varCallback )
+        return size.value()
+
+    # returns the entries of the map in iteration order, or None if the map
+    # doesn't have the expected fields
+    def walkEntries( self, value ):
+        return None
+
+    # the cursor is the local walk, or the remote entry iterator for maps
+    # without the expected fields
+    def createCursor( self, value, varCallback ):
+        entries = self.walkEntries( value )
+        if entries is None:
+            return KAssociativeContainerVisualizer.createCursor( self, value, varCallback )
+        return entries
+
+    def nextValue( self, cursor, varCallback ):
+        if isinstance( cursor, com.sun.jdi.ObjectReference ):
+            return KAssociativeContainerVisualizer.nextValue( self, cursor, varCallback )
+        return cursor.next()
+
+# -----------------------------------------------------------------------------
+
+class KHashMapVisualizer( KFieldWalkingMapVisualizer ):
+    def walkEntries( self, value ):
+        if not hasField( value, 'table' ):
+            return None
+        return self.walkTable( value )
+
+    def walkTable( self, value ):
+        table = getFieldValue( value, 'table' )
+        if table is None:
+            return
+        # all buckets in one call, then each chain through its 'next' links
+        for entry in table.getValues():
+            while entry is not None:
+                yield entry
+                entry = getFieldValue( entry, 'next' )
+
+# -----------------------------------------------------------------------------
+
+class KLinkedHashMapVisualizer( KHashMapVisualizer ):
+    def walkEntries( self, value ):
+        if hasField( value, 'head' ):
+            return self.walkFrom( getFieldValue( value, 'head' ), None )
+        if hasField( value, 'header' ):
+            # before Java 8 the entries form a ring through a 'header' sentinel
+            header = getFieldValue( value, 'header' )
+            return self.walkFrom( getFieldValue( header, 'after' ), header )
+        return KHashMapVisualizer.walkEntries( self, value )
+
+    def walkFrom( self, entry, end ):
+        while entry is not None and not sameObject( entry, end ):
+            yield entry
+            entry = getFieldValue( entry, 'after' )
+
+# -----------------------------------------------------------------------------
+
+class KTreeMapVisualizer( KFieldWalkingMapVisualizer ):
+    def walkEntries( self, value ):
+        if not hasField( value, 'root' ):
+            return None
+        return self.walkTree( getFieldValue( value, 'root' ) )
+
+    def walkTree( self, entry ):
+        # in-order walk with an explicit stack of pending entries
+        stack = []
+        while entry is not None or stack:
+            while entry is not None:
+                stack.append( entry )
+                entry = getFieldValue( entry, 'left' )
+            entry = stack.pop()
+            yield entry
+            entry = getFieldValue( entry, 'right' )
+
+# -----------------------------------------------------------------------------
+
 class KAssociativeContainerEntryVisualizer( KContainerBaseVisualizer ):
+    # the key and the value are read from the fields of the JDK entry classes,
+    # getKey/getValue are invoked only for other entries
+    def getEntry( self, value, varCallback ):
+        if hasField( value, 'key' ) and hasField( value, 'value' ):
+            return ( getFieldValue( value, 'key' ), getFieldValue( value, 'value' ) )
+        entryKey = invokeCached( self.d_vm, value, varCallback, 'getKey' )
+        entryValue = invokeCached( self.d_vm, value, varCallback, 'getValue' )
+        return ( entryKey, entryValue )
+
     def getValueString( self, type, value, varCallback ):
-        entryKey = varCallback.invokeValue( 'getKey', [] )
-        valueStr = entryKey.toString()
-        entryValue = varCallback.invokeValue( 'getValue', [] )
+        entryKey, entryValue = self.getEntry( value, varCallback )
+        valueStr = 'null'
+        if entryKey is not None:
+            valueStr = entryKey.toString()
         if entryValue:
             valueStr += " -> " + entryValue.toString()
         return valueStr.replace ( "\"", "'" )
@@ -137,11 +508,14 @@ class KAssociativeContainerEntryVisualizer( KContainerBaseVisualizer ):
         return 2
 
     def generateChildren( self, type, value, varCallback, childrenCount ):
-        entryKey = varCallback.invokeValue( 'getKey', [] )
-        keyType = entryKey.type()
+        entryKey, entryValue = self.getEntry( value, varCallback )
+        keyType = None
+        if entryKey is not None:
+            keyType = entryKey.type()
         varCallback.addField( 'key', 'key', keyType, entryKey )
-        entryValue = varCallback.invokeValue( 'getValue', [] )
-        valueType = entryValue.type()
+        valueType = None
+        if entryValue is not None:
+            valueType = entryValue.type()
         varCallback.addField( 'value', 'value', valueType, entryValue )
 
 # -----------------------------------------------------------------------------
@@ -155,11 +529,13 @@ class KContainerVisualizerFactory( IVisualizerFactory ):
         self.d_throwableTypes = frozenset( [ 'java.lang.Throwable' ] )
         
         self.d_indexedTypes = frozenset( [ 'java.util.List', 'java.util.AbstractList'
-            , 'java.util.AbstractSequentialList', 'java.util.ArrayList'
-            , 'java.util.Vector', 'java.util.LinkedList', 'java.util.Stack' ] )
+            , 'java.util.AbstractSequentialList', 'java.util.LinkedList' ] )
+
+        self.d_arrayBackedTypes = frozenset( [ 'java.util.ArrayList', 'java.util.Vector'
+            , 'java.util.Stack' ] )
             
         self.d_iterableTypes = frozenset( [ 'java.util.BlockingDeque', 'java.util.BlockingQueue'
-            , 'java.util.Deque', 'java.util.List', 'java.util.NavigableSet'
+            , 'java.util.Deque', 'java.util.NavigableSet'
             , 'java.util.Queue', 'java.util.Set', 'java.util.SortedSet'
             , 'java.util.AbstractCollection', 'java.util.AbstractQueue'
             , 'java.util.concurrent.ArrayBlockingQueue'
@@ -174,6 +550,11 @@ class KContainerVisualizerFactory( IVisualizerFactory ):
             , 'java.util.EnumSet', 'java.util.HashSet', 'java.util.LinkedHashSet' 
             , 'java.util.TreeSet', 'java.util.ArrayDeque' ] )
             
+        # maps whose entries are walked through field reads
+        self.d_fieldWalkingMapTypes = { 'java.util.HashMap': KHashMapVisualizer
+            , 'java.util.LinkedHashMap': KLinkedHashMapVisualizer
+            , 'java.util.TreeMap': KTreeMapVisualizer }
+
         self.d_associativeTypes = frozenset( [ 'java.util.Map', 'javax.script.Bindings'
             , 'java.util.ConcurrentMap', 'java.util.concurrent.ConcurrentNavigableMap'
             , 'javax.xml.ws.handler.LogicalMessageContext', 'javax.xml.ws.handler.MessageContext'
@@ -181,11 +562,11 @@ class KContainerVisualizerFactory( IVisualizerFactory ):
             , 'java.util.SortedMap', 'java.util.AbstractMap', 'java.util.jar.Attributes'
             , 'java.security.AuthProvider', 'java.util.concurrent.ConcurrentHashMap'
             , 'java.util.concurrent.ConcurrentSkipListMap', 'java.util.EnumMap'
-            , 'java.util.HashMap', 'java.util.Hashtable', 'java.util.IdentityHashMap'
-            , 'java.util.LinkedHashMap', 'javax.print.attribute.standard.PrinterStateReasons'
+            , 'java.util.Hashtable', 'java.util.IdentityHashMap'
+            , 'javax.print.attribute.standard.PrinterStateReasons'
             , 'java.util.Properties', 'java.security.Provider', 'java.awt.RenderingHints'
             , 'javax.script.SimpleBindings', 'javax.management.openmbean.TabularDataSupport'
-            , 'java.util.TreeMap', 'javax.swing.UIDefaults', 'java.util.WeakHashMap' ] )
+            , 'javax.swing.UIDefaults', 'java.util.WeakHashMap' ] )
 
         # names of entry-type for associative containers are unpredictable, so we detect their
         # names dynamically - when user wants to show associative container the first time, we get
@@ -196,40 +577,137 @@ class KContainerVisualizerFactory( IVisualizerFactory ):
         # stored ( in self.d_associativeEntryTypes )
         self.d_entryTypesStoredFor = set()
 
+        # the visualizer manager only dispatches on exact type names, so loaded subclasses of the
+        # supported collection and map types ( e.g. MyList extends ArrayList ) are registered with
+        # it by name too; d_subtypeNames maps their names to the nearest supported ancestor
+        self.d_subtypeNames = {}
+
+        # nearest supported container ancestor ( or None ) of every ReferenceType scanned so far
+        self.d_resolvedTypes = {}
+
+        # number of loaded classes at the last scan, per VM
+        self.d_scannedClassCounts = {}
+
+        # packages of the JDK internals, which aren't scanned for subtypes
+        self.d_skippedPackages = ( 'sun.', 'com.sun.', 'jdk.' )
+
     def getSupportedTypes( self ):
+        # subtypes of the VMs already connected are returned here, not registered
+        for vm in com.sun.jdi.Bootstrap.virtualMachineManager().connectedVirtualMachines():
+            self.registerSubtypes( vm, False )
         result = list ( self.d_stringConvertibleTypes ) \
             + list( self.d_fileTypes ) \
             + list( self.d_throwableTypes ) \
             + list( self.d_indexedTypes ) \
+            + list( self.d_arrayBackedTypes ) \
             + list( self.d_iterableTypes ) \
+            + list( self.d_fieldWalkingMapTypes.keys() ) \
             + list( self.d_associativeTypes ) \
-            + list( self.d_associativeEntryTypes )
+            + list( self.d_associativeEntryTypes ) \
+            + list( self.d_subtypeNames.keys() )
+        return result
+
+    def isSupportedName( self, typeName ):
+        return typeName in self.d_stringConvertibleTypes \
+            or typeName in self.d_fileTypes \
+            or typeName in self.d_throwableTypes \
+            or typeName in self.d_associativeEntryTypes \
+            or self.isContainerName( typeName )
+
+    # subtypes are only resolved to collections and maps: the string, file and throwable
+    # visualizers hide the fields that subclasses add
+    def isContainerName( self, typeName ):
+        return typeName in self.d_indexedTypes \
+            or typeName in self.d_arrayBackedTypes \
+            or typeName in self.d_iterableTypes \
+            or typeName in self.d_fieldWalkingMapTypes \
+            or typeName in self.d_associativeTypes
+
+    # returns the name of the nearest supported container type among referenceType, its superclasses
+    # ( nearest first ) and then its interfaces, or None; memoized per ReferenceType
+    def resolveType( self, referenceType ):
+        if referenceType in self.d_resolvedTypes:
+            return self.d_resolvedTypes[ referenceType ]
+        candidates = []
+        if isinstance( referenceType, com.sun.jdi.ClassType ):
+            superclass = referenceType
+            while superclass is not None:
+                candidates.append( superclass )
+                superclass = superclass.superclass()
+            candidates.extend( referenceType.allInterfaces() )
+        elif isinstance( referenceType, com.sun.jdi.InterfaceType ):
+            candidates.append( referenceType )
+            candidates.extend( referenceType.superinterfaces() )
+        result = None
+        for candidate in candidates:
+            if self.isContainerName( candidate.name() ):
+                result = candidate.name()
+                break
+        self.d_resolvedTypes[ referenceType ] = result
         return result
 
+    # records the loaded subtypes of supported container types, registering them with the
+    # visualizer manager if notify is set; only classes loaded since the last scan are resolved
+    def registerSubtypes( self, vm, notify = True ):
+        classes = vm.allClasses()
+        if self.d_scannedClassCounts.get( vm ) == len( classes ):
+            return
+        self.d_scannedClassCounts[ vm ] = len( classes )
+        for referenceType in classes:
+            if referenceType in self.d_resolvedTypes:
+                continue
+            typeName = referenceType.name()
+            if typeName.startswith( self.d_skippedPackages ):
+                self.d_resolvedTypes[ referenceType ] = None
+                continue
+            if self.isSupportedName( typeName ) or typeName in self.d_subtypeNames:
+                continue
+            ancestorName = self.resolveType( referenceType )
+            if ancestorName is None:
+                continue
+            self.d_subtypeNames[ typeName ] = ancestorName
+            if notify:
+                self.d_visualizerManagerCallback.addSupportedEntryType( self, typeName )
+
     def allocVisualizer( self, vm, typeName ):
-        if typeName in self.d_stringConvertibleTypes:
+        self.registerSubtypes( vm )
+        visualizer = self.allocVisualizerFor( vm, typeName, typeName )
+        if visualizer is None and typeName in self.d_subtypeNames:
+            visualizer = self.allocVisualizerFor( vm, typeName, self.d_subtypeNames[ typeName ] )
+        return visualizer
+
+    # allocates the visualizer of typeName, chosen as for the supported type supportedName
+    def allocVisualizerFor( self, vm, typeName, supportedName ):
+        if supportedName in self.d_stringConvertibleTypes:
             return KStringConvertibleVisualizer( vm )
-        elif typeName in self.d_fileTypes:
+        elif supportedName in self.d_fileTypes:
             return KFileVisualizer( vm )
-        elif typeName in self.d_throwableTypes:
+        elif supportedName in self.d_throwableTypes:
             return KThrowableVisualizer( vm )
-        elif typeName in self.d_indexedTypes:
+        elif supportedName in self.d_arrayBackedTypes:
+            return KArrayBackedContainerVisualizer( vm )
+        elif supportedName in self.d_indexedTypes:
             return KIndexedContainerVisualizer( vm )
-        elif typeName in self.d_iterableTypes:
+        elif supportedName in self.d_iterableTypes:
             return KIterableContainerVisualizer( vm )
-        elif typeName in self.d_associativeTypes:
-            storeEntryTypeCallback = None
-            if typeName not in self.d_entryTypesStoredFor:
-                # name of entry-type for this associative container wasn't stored yet
-                # it will be stored in addSupportedEntryType called as callback
-                # from newly created KAssociativeContainerVisualizer object
-                storeEntryTypeCallback = self
-            return KAssociativeContainerVisualizer( vm, storeEntryTypeCallback )
-        elif typeName in self.d_associativeEntryTypes:
+        elif supportedName in self.d_fieldWalkingMapTypes:
+            visualizerClass = self.d_fieldWalkingMapTypes[ supportedName ]
+            return visualizerClass( vm, self.getStoreEntryTypeCallback( typeName ) )
+        elif supportedName in self.d_associativeTypes:
+            return KAssociativeContainerVisualizer( vm, self.getStoreEntryTypeCallback( typeName ) )
+        elif supportedName in self.d_associativeEntryTypes:
             return KAssociativeContainerEntryVisualizer( vm )
         else:
             return None
             
+    def getStoreEntryTypeCallback( self, typeName ):
+        if typeName in self.d_entryTypesStoredFor:
+            return None
+        # name of entry-type for this associative container wasn't stored yet
+        # it will be stored in addSupportedEntryType called as callback
+        # from newly created KAssociativeContainerVisualizer object
+        return self
+
     def addSupportedEntryType( self, associativeTypeName, entryTypeName ):
         assert associativeTypeName not in self.d_entryTypesStoredFor
         self.d_entryTypesStoredFor.add( associativeTypeName )
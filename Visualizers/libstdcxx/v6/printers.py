@@ -16,8 +16,16 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import gdb
-import itertools
 import re
+import struct
+
+from printerCore import memory
+from printerCore import paging
+from printerCore import registry
+from printerCore import settings
+from printerCore import summary
+from printerCore import table
+from printerCore import typecache
 
 class StdPointerPrinter:
     "Print a smart pointer of some kind"
@@ -42,27 +50,85 @@ class UniquePointerPrinter:
     def to_string (self):
         return self.val['_M_t']
 
+class ListWalker:
+    "Follow the _M_next links of a circular list, reading each node's link pair once"
+
+    def __init__(self, head, limit):
+        self.head = int (head.address)
+        self.limit = limit
+        self.layout = typecache.layout ('list', head.type.strip_typedefs (), self.node_layout)
+        self.node = None
+        self.count = 0
+        self.cycle = False
+        # Brent's cycle detection: the tortoise jumps to the walker
+        # after 1, 2, 4, ... steps.
+        self.tortoise = self.head
+        self.power = 1
+        self.steps = 1
+
+    @staticmethod
+    def node_layout (headtype):
+        "Return the bytes read per node and the offset of _M_next."
+        # The head is a _List_node_base, or derives from it: a
+        # _List_node<size_t> in GCC 5 and 6, a _List_node_header since.
+        found = find_field (headtype, '_M_next')
+        if found == None:
+            raise gdb.error ('Cannot find _M_next in %s.' % headtype)
+        offset, type = found
+        format = memory.scalar_format (type.strip_typedefs ())
+        return (offset + struct.calcsize (format), offset, format)
+
+    def __iter__(self):
+        return self
+
+    def next_node(self, address):
+        size, offset, format = self.layout
+        data = memory.read (address, size)
+        return struct.unpack_from (memory.endian () + format, data, offset)[0]
+
+    def advance(self):
+        if self.node == None:
+            self.node = self.next_node (self.head)
+        if self.node == self.head or not self.node or self.cycle or self.count >= self.limit:
+            raise StopIteration
+        address = self.node
+        self.node = self.next_node (address)
+        self.count = self.count + 1
+        if self.node != self.head and self.node == self.tortoise:
+            # The links loop without passing through the head again.
+            self.cycle = True
+        if self.power == self.steps:
+            self.tortoise = self.node
+            self.power = self.power * 2
+            self.steps = 0
+        self.steps = self.steps + 1
+        return address
+
+    def next(self):
+        return self.advance()
+
+    def __next__(self):
+        return self.advance()
+
 class StdListPrinter:
     "Print a std::list"
 
     class _iterator:
-        def __init__(self, nodetype, head):
-            self.nodetype = nodetype
-            self.base = head['_M_next']
-            self.head = head.address
+        def __init__(self, walker, itype, offset):
+            self.walker = walker
+            self.itype = itype.pointer()
+            self.offset = offset
             self.count = 0
 
         def __iter__(self):
             return self
 
         def advance(self):
-            if self.base == self.head:
-                raise StopIteration
-            elt = self.base.cast(self.nodetype).dereference()
-            self.base = elt['_M_next']
+            address = self.walker.advance()
             count = self.count
             self.count = self.count + 1
-            return ('[%d]' % count, elt['_M_data'])
+            elt = gdb.Value(address + self.offset).cast(self.itype).dereference()
+            return ('[%d]' % count, elt)
 
         def next(self):
             return self.advance()
@@ -73,23 +139,75 @@ class StdListPrinter:
     def __init__(self, typename, val):
         self.typename = typename
         self.val = val
+        # Without _M_size the count is a walk of the list; display_hint
+        # asks for it too, so it is computed once per printer.
+        self.string = None
 
-    def children(self):
-        itype = self.val.type.template_argument(0)
+    def data_offset(self, itype):
+        "Return the offset of the element within a list node."
         # If the inferior program is compiled with -D_GLIBCXX_DEBUG
         # some of the internal implementation details change.
-        if self.typename == "std::list":
-            nodetype = gdb.lookup_type('std::_List_node<%s>' % itype).pointer()
-        elif self.typename == "std::__debug::list":
-            nodetype = gdb.lookup_type('std::__norm::_List_node<%s>' % itype).pointer()
+        if self.typename.startswith("std::__debug::"):
+            nodename = 'std::__norm::_List_node<%s>' % itype
         else:
-            raise "Cannot cast list node for list printer."
-        return self._iterator(nodetype, self.val['_M_impl']['_M_node'])
+            nodename = 'std::_List_node<%s>' % itype
+        try:
+            nodetype = typecache.lookup_type(nodename)
+        except gdb.error:
+            # The element follows the two links.
+            return 2 * typecache.pointer_size()
+        for field in nodetype.fields():
+            if field.name in ('_M_data', '_M_storage'):
+                return field.bitpos // 8
+        raise gdb.error("Cannot find the data of %s." % nodename)
+
+    def size(self):
+        "Return the element count kept by the C++11 ABI, or None."
+        node = self.val['_M_impl']['_M_node']
+        nodetype = node.type.strip_typedefs()
+        for field in nodetype.fields():
+            if field.name == '_M_size':
+                return int(node['_M_size'])
+        # GCC 5 and 6 keep the count in the data of a _List_node<size_t>.
+        if nodetype.tag != None and nodetype.tag.startswith('std::_List_node<'):
+            sizetype = nodetype.template_argument(0)
+            address = int(node.address) + self.data_offset(sizetype)
+            return int(gdb.Value(address).cast(sizetype.pointer()).dereference())
+        return None
+
+    def walker(self, limit):
+        return ListWalker(self.val['_M_impl']['_M_node'], limit)
+
+    def children(self):
+        itype = self.val.type.template_argument(0)
+        size = self.size()
+        if size == None:
+            size = settings.NODE_WALK_LIMIT
+        return self._iterator(self.walker(size), itype, self.data_offset(itype))
 
     def to_string(self):
-        if self.val['_M_impl']['_M_node'].address == self.val['_M_impl']['_M_node']['_M_next']:
+        if self.string == None:
+            self.string = self.describe()
+        return self.string
+
+    def describe(self):
+        size = self.size()
+        if size == None and settings.LIST_COUNT_LIMIT <= 0:
+            head = self.val['_M_impl']['_M_node']
+            if head.address == head['_M_next']:
+                return 'empty std::list'
+            return 'std::list'
+        if size == None:
+            # Count the nodes, as far as LIST_COUNT_LIMIT.
+            walker = self.walker(settings.LIST_COUNT_LIMIT)
+            size = len(list(walker))
+            if walker.cycle:
+                return 'std::list with a corrupt (cyclic) node chain'
+            if size == settings.LIST_COUNT_LIMIT and walker.node != walker.head:
+                return 'std::list with more than %d elements' % (size,)
+        if size == 0:
             return 'empty std::list'
-        return 'std::list'
+        return 'std::list with %d elements' % (size,)
 
     def display_hint (self):
         return '#' + self.to_string()
@@ -106,9 +224,9 @@ class StdListIteratorPrinter:
         # If the inferior program is compiled with -D_GLIBCXX_DEBUG
         # some of the internal implementation details change.
         if self.typename == "std::_List_iterator" or self.typename == "std::_List_const_iterator":
-            nodetype = gdb.lookup_type('std::_List_node<%s>' % itype).pointer()
+            nodetype = typecache.lookup_type('std::_List_node<%s>' % itype).pointer()
         elif self.typename == "std::__norm::_List_iterator" or self.typename == "std::__norm::_List_const_iterator":
-            nodetype = gdb.lookup_type('std::__norm::_List_node<%s>' % itype).pointer()
+            nodetype = typecache.lookup_type('std::__norm::_List_node<%s>' % itype).pointer()
         else:
             raise "Cannot cast list node for list iterator printer."
         return self.val['_M_node'].cast(nodetype).dereference()['_M_data']
@@ -145,7 +263,7 @@ class StdSlistPrinter:
 
     def children(self):
         itype = self.val.type.template_argument(0)
-        nodetype = gdb.lookup_type('__gnu_cxx::_Slist_node<%s>' % itype).pointer()
+        nodetype = typecache.lookup_type('__gnu_cxx::_Slist_node<%s>' % itype).pointer()
         return self._iterator(nodetype, self.val)
 
     def to_string(self):
@@ -164,17 +282,17 @@ class StdSlistIteratorPrinter:
 
     def to_string(self):
         itype = self.val.type.template_argument(0)
-        nodetype = gdb.lookup_type('__gnu_cxx::_Slist_node<%s>' % itype).pointer()
+        nodetype = typecache.lookup_type('__gnu_cxx::_Slist_node<%s>' % itype).pointer()
         return self.val['_M_node'].cast(nodetype).dereference()['_M_data']
 
 class StdVectorPrinter:
     "Print a std::vector"
 
     class _iterator:
-        def __init__ (self, start, finish):
+        def __init__ (self, start, finish, count = 0):
             self.item = start
             self.finish = finish
-            self.count = 0
+            self.count = count
 
         def __iter__(self):
             return self
@@ -194,13 +312,97 @@ class StdVectorPrinter:
         def __next__(self):
             return self.advance()
 
+    # Walk the elements from a local copy of [_M_start, _M_finish).
+    class _bulk_iterator:
+        def __init__ (self, elements, count = 0):
+            self.elements = elements
+            self.count = count
+
+        def __iter__(self):
+            return self
+
+        def advance(self):
+            if self.count == len(self.elements):
+                raise StopIteration
+            count = self.count
+            self.count = self.count + 1
+            return ('[%d]' % count, self.elements[count])
+
+        def next(self):
+            return self.advance()
+
+        def __next__(self):
+            return self.advance()
+
     def __init__(self, typename, val):
         self.typename = typename
         self.val = val
 
+    def size(self):
+        return int(self.val['_M_impl']['_M_finish'] - self.val['_M_impl']['_M_start'])
+
+    def element_type(self):
+        "Return the element type if the elements are in a plain array, else None."
+        # _M_start is the allocator's pointer typedef.
+        ptrtype = self.val['_M_impl']['_M_start'].type.strip_typedefs()
+        if ptrtype.code != gdb.TYPE_CODE_PTR:
+            return None
+        return ptrtype.target()
+
+    def elements(self, offset):
+        "Return an iterator over the children from element OFFSET on."
+        start = self.val['_M_impl']['_M_start']
+        finish = self.val['_M_impl']['_M_finish']
+        elttype = self.element_type()
+        if (elttype != None and memory.is_scalar(elttype)
+            and memory.decodes(int(finish - start))):
+            elements = memory.ScalarArray(int(start), elttype, int(finish - start))
+            try:
+                # Read the first block now, so that unreadable memory
+                # falls back to the element by element walk.
+                if offset < len(elements):
+                    elements.load(offset)
+                return self._bulk_iterator(elements, offset)
+            except gdb.error:
+                pass
+        return self._iterator(start + offset, finish, offset)
+
+    def summary(self):
+        "Return the summary of the elements, or None if they are listed one by one."
+        elttype = self.element_type()
+        if elttype == None:
+            return None
+        size = self.size()
+        if not summary.applies(elttype, size):
+            return None
+        try:
+            data = memory.read(int(self.val['_M_impl']['_M_start']), size * elttype.sizeof)
+        except gdb.error:
+            return None
+        return summary.summarize(data, memory.scalar_format(elttype), size)
+
+    def table(self):
+        "Return the elements as a printerCore.table.Table, or None if they are not records."
+        elttype = self.element_type()
+        if elttype == None or not table.supports(elttype):
+            return None
+        return table.read(int(self.val['_M_impl']['_M_start']), elttype, self.size())
+
     def children(self):
-        return self._iterator(self.val['_M_impl']['_M_start'],
-                              self.val['_M_impl']['_M_finish'])
+        result = self.summary()
+        if result != None:
+            return summary.children(result, self.element_type())
+        elttype = self.element_type()
+        if elttype != None and table.applies(elttype):
+            try:
+                return self.table().children()
+            except gdb.error:
+                pass
+        return self.elements(0)
+
+    def children_range(self, offset, count):
+        offset, count = paging.clamp(offset, count, self.size())
+        return paging.Window(self.elements(offset), count)
 
     def to_string(self):
         start = self.val['_M_impl']['_M_start']
@@ -224,56 +426,114 @@ class StdTuplePrinter:
     "Print a std::tuple"
 
     class _iterator:
-        def __init__ (self, head):
-            self.head = head
-
-            # Set the base class as the initial head of the
-            # tuple.
-            nodes = self.head.type.fields ()
-            if len (nodes) != 1:
-                raise "Top of tuple tree does not consist of a single node."
-
-            # Set the actual head to the first pair.
-            self.head  = self.head.cast (nodes[0].type)
+        def __init__ (self, val, layout):
+            self.val = val
+            self.layout = layout
             self.count = 0
+            self.data = None
+            self.address = None
+            if val.address != None:
+                self.address = int (val.address)
+            self.decoded = memory.decodes (len (layout))
 
         def __iter__ (self):
             return self
 
-        def next (self):
-            nodes = self.head.type.fields ()
-            # Check for further recursions in the inheritance tree.
-            if len (nodes) == 0:
+        def element (self, path, field, offset, type):
+            format = memory.scalar_format (type)
+            if self.address == None:
+                # Not in memory: cast along the path.
+                value = self.val
+                for base in path:
+                    value = value.cast (base)
+                if field != None:
+                    value = value[field]
+                return value
+            if format != None and self.decoded:
+                try:
+                    if self.data == None:
+                        # All scalar elements come from one read.
+                        self.data = memory.read (self.address, self.val.type.sizeof)
+                    return memory.make_value (memory.decode (self.data, format, 1, offset)[0], type)
+                except gdb.error:
+                    pass
+            return gdb.Value (self.address + offset).cast (type.pointer ()).dereference ()
+
+        def advance (self):
+            if self.count == len (self.layout):
                 raise StopIteration
-            # Check that this iteration has an expected structure.
-            if len (nodes) != 2:
-                raise "Cannot parse more than 2 nodes in a tuple tree."
-
-            # - Left node is the next recursion parent.
-            # - Right node is the actual class contained in the tuple.
-
-            # Process right node.
-            impl = self.head.cast (nodes[1].type)
-
-            # Process left node and set it as head.
-            self.head  = self.head.cast (nodes[0].type)
+            element = self.element (*self.layout[self.count])
             self.count = self.count + 1
+            return ('[%d]' % self.count, element)
 
-            # Finally, check the implementation.  If it is
-            # wrapped in _M_head_impl return that, otherwise return
-            # the value "as is".
-            fields = impl.type.fields ()
-            if len (fields) < 1 or fields[0].name != "_M_head_impl":
-                return ('[%d]' % self.count, impl)
-            else:
-                return ('[%d]' % self.count, impl['_M_head_impl'])
+        def next (self):
+            return self.advance ()
+
+        def __next__ (self):
+            return self.advance ()
 
     def __init__ (self, typename, val):
         self.typename = typename
         self.val = val;
 
+    @staticmethod
+    def layout (type):
+        "Return the (base path, field name, offset, type) of each element of tuple TYPE."
+        return typecache.layout ('tuple', type.strip_typedefs (), StdTuplePrinter.compute_layout)
+
+    @staticmethod
+    def compute_layout (type):
+        # std::tuple derives from _Tuple_impl<0, T...>.  Each
+        # _Tuple_impl<i, H, T...> derives from _Tuple_impl<i + 1, T...>
+        # and from _Head_base<i, H>, which holds the element in
+        # _M_head_impl or, for empty classes, derives from it.  The
+        # last _Tuple_impl has the _Head_base only; older libraries end
+        # the chain with an empty _Tuple_impl<n> instead.
+        elements = []
+        nodes = type.fields ()
+        if len (nodes) != 1:
+            raise gdb.error ("Top of tuple tree does not consist of a single node.")
+        path = [nodes[0].type]
+        offset = nodes[0].bitpos // 8
+        impl = nodes[0].type.strip_typedefs ()
+        while impl != None:
+            nodes = impl.fields ()
+            if len (nodes) > 2:
+                raise gdb.error ("Cannot parse more than 2 nodes in a tuple tree.")
+            next = None
+            for node in nodes:
+                if node.is_base_class and re.match ('^[\\w:]*_Tuple_impl<', str (node.type.strip_typedefs ())):
+                    next = node
+                else:
+                    head = node
+            if len (nodes) == 0 or (len (nodes) == 1 and next != None):
+                # The empty terminator.
+                nodes = []
+            if len (nodes) > 0:
+                head_path = path + [head.type]
+                head_offset = offset + head.bitpos // 8
+                field = None
+                element = head.type
+                fields = head.type.strip_typedefs ().fields ()
+                if len (fields) >= 1 and fields[0].name == '_M_head_impl':
+                    field = '_M_head_impl'
+                    head_offset = head_offset + fields[0].bitpos // 8
+                    element = fields[0].type
+                elif len (fields) >= 1 and fields[0].is_base_class:
+                    # An empty element, kept as a base of _Head_base.
+                    head_path.append (fields[0].type)
+                    head_offset = head_offset + fields[0].bitpos // 8
+                    element = fields[0].type
+                elements.append ((tuple (head_path), field, head_offset, element))
+            if next == None:
+                break
+            path = path + [next.type]
+            offset = offset + next.bitpos // 8
+            impl = next.type.strip_typedefs ()
+        return elements
+
     def children (self):
-        return self._iterator (self.val)
+        return self._iterator (self.val, self.layout (self.val.type))
 
     def to_string (self):
         return '%s containing' % (self.typename)
@@ -301,38 +561,81 @@ class StdStackOrQueuePrinter:
         return None
 
 class RbtreeIterator:
+    "Walk the nodes of a red-black tree in order, reading each node header once"
+
+    # Deeper than any red-black tree that fits in memory; only a
+    # corrupt tree gets there.
+    max_depth = 128
+
     def __init__(self, rbtree):
-        self.size = rbtree['_M_t']['_M_impl']['_M_node_count']
-        self.node = rbtree['_M_t']['_M_impl']['_M_header']['_M_left']
+        impl = rbtree['_M_t']['_M_impl']
+        self.size = int (impl['_M_node_count'])
+        self.header = impl['_M_header']
+        self.nodetype = self.header['_M_parent'].type
+        self.layout = typecache.layout ('rbtree', self.header.type.strip_typedefs (), self.node_layout)
+        # Pending (node, right child) addresses, the next node on top.
+        self.stack = None
         self.count = 0
 
+    @staticmethod
+    def node_layout (basetype):
+        "Return the size of _Rb_tree_node_base and the offsets of its child links."
+        offsets = {}
+        for field in basetype.fields ():
+            offsets[field.name] = field.bitpos // 8
+        return (basetype.sizeof, offsets['_M_left'], offsets['_M_right'],
+                memory.scalar_format (basetype.pointer ()))
+
     def __iter__(self):
         return self
 
     def __len__(self):
-        return int (self.size)
+        return self.size
+
+    def read_node(self, address):
+        "Return the (left, right) child addresses of the node at ADDRESS."
+        size, left, right, format = self.layout
+        data = memory.read (address, size)
+        format = memory.endian () + format
+        return (struct.unpack_from (format, data, left)[0],
+                struct.unpack_from (format, data, right)[0])
+
+    def push_left(self, address):
+        while address and len (self.stack) < self.max_depth:
+            left, right = self.read_node (address)
+            self.stack.append ((address, right))
+            address = left
+
+    def start(self):
+        if self.stack == None:
+            self.stack = []
+            self.push_left (int (self.header['_M_parent']))
+
+    def seek(self, key, position):
+        "Move to element POSITION, resuming from the closest cursor remembered for KEY."
+        cursor = paging.cursors.get (key, position)
+        if cursor != None and cursor[0] >= self.count:
+            self.count = cursor[0]
+            self.stack = list (cursor[1])
+        while self.count < position:
+            self.advance ()
+            # Leave cursors behind on long walks, too.
+            if self.count % paging.CURSOR_INTERVAL == 0:
+                self.remember (key)
+
+    def remember(self, key):
+        "Remember the current position as a cursor for KEY."
+        if self.stack != None and self.count < self.size:
+            paging.cursors.put (key, self.count, tuple (self.stack))
 
     def advance(self):
-        if self.count == self.size:
+        self.start ()
+        if self.count == self.size or not self.stack:
             raise StopIteration
-        result = self.node
+        address, right = self.stack.pop ()
+        self.push_left (right)
         self.count = self.count + 1
-        if self.count < self.size:
-            # Compute the next node.
-            node = self.node
-            if node.dereference()['_M_right']:
-                node = node.dereference()['_M_right']
-                while node.dereference()['_M_left']:
-                    node = node.dereference()['_M_left']
-            else:
-                parent = node.dereference()['_M_parent']
-                while node == parent.dereference()['_M_right']:
-                    node = parent
-                    parent = parent.dereference()['_M_parent']
-                if node.dereference()['_M_right'] != parent:
-                    node = parent
-            self.node = node
-        return result
+        return gdb.Value (address).cast (self.nodetype)
 
     def next(self):
         return self.advance()
@@ -351,7 +654,7 @@ class StdRbtreeIteratorPrinter:
 
     def to_string (self):
         valuetype = self.val.type.template_argument(0)
-        nodetype = gdb.lookup_type('std::_Rb_tree_node < %s >' % valuetype)
+        nodetype = typecache.lookup_type('std::_Rb_tree_node < %s >' % valuetype)
         nodetype = nodetype.pointer()
         return self.val.cast(nodetype).dereference()['_M_value_field']
 
@@ -372,9 +675,9 @@ class StdMapPrinter:
 
     # Turn an RbtreeIterator into a pretty-print iterator.
     class _iter:
-        def __init__(self, rbiter, type):
+        def __init__(self, rbiter, type, count = 0):
             self.rbiter = rbiter
-            self.count = 0
+            self.count = count
             self.type = type
 
         def __iter__(self):
@@ -406,12 +709,23 @@ class StdMapPrinter:
         return '%s with %d elements' % (self.typename,
                                         len (RbtreeIterator (self.val)))
 
-    def children (self):
+    def nodetype (self):
         keytype = self.val.type.template_argument(0).const()
         valuetype = self.val.type.template_argument(1)
-        nodetype = gdb.lookup_type('std::_Rb_tree_node< std::pair< %s, %s > >' % (keytype, valuetype))
-        nodetype = nodetype.pointer()
-        return self._iter (RbtreeIterator (self.val), nodetype)
+        nodetype = typecache.lookup_type('std::_Rb_tree_node< std::pair< %s, %s > >' % (keytype, valuetype))
+        return nodetype.pointer()
+
+    def children (self):
+        return self._iter (RbtreeIterator (self.val), self.nodetype ())
+
+    def children_range (self, offset, count):
+        rbiter = RbtreeIterator (self.val)
+        offset, count = paging.clamp (offset, count, len (rbiter))
+        key = paging.container_key (self.val, self.typename)
+        rbiter.seek (key, offset)
+        # Each element is a key child followed by a value child.
+        return paging.Window (self._iter (rbiter, self.nodetype (), 2 * offset),
+                              2 * count, lambda: rbiter.remember (key))
 
     def display_hint (self):
         return 'map'
@@ -421,9 +735,9 @@ class StdSetPrinter:
 
     # Turn an RbtreeIterator into a pretty-print iterator.
     class _iter:
-        def __init__(self, rbiter, type):
+        def __init__(self, rbiter, type, count = 0):
             self.rbiter = rbiter
-            self.count = 0
+            self.count = count
             self.type = type
 
         def __iter__(self):
@@ -451,10 +765,20 @@ class StdSetPrinter:
     def to_string (self):
         return '[%d]' % (len (RbtreeIterator (self.val)),)
 
-    def children (self):
+    def nodetype (self):
         keytype = self.val.type.template_argument(0)
-        nodetype = gdb.lookup_type('std::_Rb_tree_node< %s >' % keytype).pointer()
-        return self._iter (RbtreeIterator (self.val), nodetype)
+        return typecache.lookup_type('std::_Rb_tree_node< %s >' % keytype).pointer()
+
+    def children (self):
+        return self._iter (RbtreeIterator (self.val), self.nodetype ())
+
+    def children_range (self, offset, count):
+        rbiter = RbtreeIterator (self.val)
+        offset, count = paging.clamp (offset, count, len (rbiter))
+        key = paging.container_key (self.val, self.typename)
+        rbiter.seek (key, offset)
+        return paging.Window (self._iter (rbiter, self.nodetype (), offset),
+                              count, lambda: rbiter.remember (key))
 
     def display_hint (self):
         return '#' + self.to_string()
@@ -462,78 +786,157 @@ class StdSetPrinter:
 class StdBitsetPrinter:
     "Print a std::bitset"
 
+    # Positions of the set bits of every byte value.
+    byte_bits = tuple([tuple([bit for bit in range(8) if value >> bit & 1])
+                       for value in range(256)])
+
     def __init__(self, typename, val):
         self.typename = typename
         self.val = val
+        self.indices = None
 
-    def to_string (self):
-        # If template_argument handled values, we could print the
-        # size.  Or we could use a regexp on the type.
-        return '%s' % (self.typename)
-
-    def children (self):
+    def bits (self):
+        "Return the words of _M_w as bytes, least significant bit first."
         words = self.val['_M_w']
-        wtype = words.type
+        wtype = words.type.strip_typedefs ()
 
         # The _M_w member can be either an unsigned long, or an
         # array.  This depends on the template specialization used.
-        # If it is a single long, convert to a single element list.
         if wtype.code == gdb.TYPE_CODE_ARRAY:
-            tsize = wtype.target ().sizeof
+            word = wtype.target ()
         else:
-            words = [words]
-            tsize = wtype.sizeof 
-
-        nwords = wtype.sizeof / tsize
+            word = wtype
+        nwords = wtype.sizeof // word.sizeof
+        format = memory.scalar_format (word).upper ()
+        if words.address != None:
+            data = memory.read (int (words.address), wtype.sizeof)
+            numbers = memory.decode (data, format, nwords)
+        elif nwords == 1:
+            numbers = [int (words)]
+        else:
+            numbers = [int (words[i]) for i in range (nwords)]
+        # Bit N of the set is bit N % 8 of byte N // 8 once the words
+        # are little endian, whatever the target.
+        return struct.pack ('<%d%s' % (nwords, format), *numbers)
+
+    def set_bits (self):
+        "Return the indices of the set bits, in increasing order."
+        if self.indices != None:
+            return self.indices
+        data = self.bits ()
+        if memory.numpy != None:
+            octets = memory.numpy.frombuffer (data, memory.numpy.uint8)
+            bits = memory.numpy.unpackbits (octets[:, None], axis = 1)[:, ::-1]
+            self.indices = memory.numpy.flatnonzero (bits).tolist ()
+        else:
+            indices = []
+            for index, value in enumerate (bytearray (data)):
+                if value:
+                    base = index * 8
+                    for bit in self.byte_bits[value]:
+                        indices.append (base + bit)
+            self.indices = indices
+        return self.indices
+
+    def runs (self):
+        "Return the set bits as a list of (first, last) runs."
         result = []
-        byte = 0
-        while byte < nwords:
-            w = words[byte]
-            bit = 0
-            while w != 0:
-                if (w & 1) != 0:
-                    # Another spot where we could use 'set'?
-                    result.append(('[%d]' % (byte * tsize * 8 + bit), 1))
-                bit = bit + 1
-                w = w >> 1
-            byte = byte + 1
+        for index in self.set_bits ():
+            if result and result[-1][1] == index - 1:
+                result[-1] = (result[-1][0], index)
+            else:
+                result.append ((index, index))
         return result
 
+    def to_string (self):
+        try:
+            size = '<%d>' % int (self.val.type.strip_typedefs ().template_argument (0))
+        except (gdb.error, RuntimeError):
+            size = ''
+        indices = self.set_bits ()
+        if not indices:
+            return '%s%s with no bits set' % (self.typename, size)
+        runs = self.runs ()
+        shown = []
+        for first, last in runs[:settings.BITSET_RUNS_SHOWN]:
+            if first == last:
+                shown.append ('%d' % first)
+            else:
+                shown.append ('%d-%d' % (first, last))
+        if len (runs) > settings.BITSET_RUNS_SHOWN:
+            shown.append (settings.ELIDED_MARKER)
+        return '%s%s with %d bits set (%s)' % (self.typename, size, len (indices),
+                                               ', '.join (shown))
+
+    def children (self):
+        return [('[%d]' % index, 1) for index in self.set_bits ()]
+
+    def children_range (self, offset, count):
+        indices = self.set_bits ()
+        offset, count = paging.clamp (offset, count, len (indices))
+        return [('[%d]' % index, 1) for index in indices[offset:offset + count]]
+
     def display_hint (self):
         return '#' + self.to_string()
 
 class StdDequePrinter:
     "Print a std::deque"
 
+    # Elements are located by (buffer, slot) arithmetic on a local copy
+    # of the map of buffer pointers; in large deques, buffers of scalars
+    # are read and decoded one block at a time.
+    class _segments:
+        def __init__(self, elttype, buffer_size, start, finish, decoded):
+            self.elttype = elttype
+            self.pointer = elttype.pointer()
+            self.buffer_size = buffer_size
+            self.first_slot = int(start['_M_cur'] - start['_M_first'])
+            first_node = start['_M_node']
+            count = int(finish['_M_node'] - first_node) + 1
+            format = memory.scalar_format(first_node.type)
+            data = memory.read(int(first_node), count * first_node.type.sizeof)
+            self.nodes = memory.decode(data, format, count)
+            self.format = None
+            if decoded:
+                self.format = memory.scalar_format(elttype)
+            # The decoded buffer: (index in nodes, numbers).
+            self.segment = None
+
+        def locate(self, index):
+            "Return the (buffer, slot) holding element INDEX."
+            position = self.first_slot + index
+            return (position // self.buffer_size, position % self.buffer_size)
+
+        def __getitem__(self, index):
+            node, slot = self.locate(index)
+            address = self.nodes[node]
+            if self.format != None:
+                try:
+                    if self.segment == None or self.segment[0] != node:
+                        data = memory.read(address, self.buffer_size * self.elttype.sizeof)
+                        self.segment = (node, memory.decode(data, self.format, self.buffer_size))
+                    return memory.make_value(self.segment[1][slot], self.elttype)
+                except gdb.error:
+                    # A partly unreadable buffer; go element by element.
+                    self.format = None
+            address = address + slot * self.elttype.sizeof
+            return gdb.Value(address).cast(self.pointer).dereference()
+
     class _iter:
-        def __init__(self, node, start, end, last, buffer_size):
-            self.node = node
-            self.p = start
-            self.end = end
+        def __init__(self, segments, count, last):
+            self.segments = segments
+            self.count = count
             self.last = last
-            self.buffer_size = buffer_size
-            self.count = 0
 
         def __iter__(self):
             return self
 
         def advance(self):
-            if self.p == self.last:
+            if self.count >= self.last:
                 raise StopIteration
-
-            result = ('[%d]' % self.count, self.p.dereference())
+            count = self.count
             self.count = self.count + 1
-
-            # Advance the 'cur' pointer.
-            self.p = self.p + 1
-            if self.p == self.end:
-                # If we got to the end of this bucket, move to the
-                # next bucket.
-                self.node = self.node + 1
-                self.p = self.node[0]
-                self.end = self.p + self.buffer_size
-
-            return result
+            return ('[%d]' % count, self.segments[count])
 
         def next(self):
             return self.advance()
@@ -547,11 +950,11 @@ class StdDequePrinter:
         self.elttype = val.type.template_argument(0)
         size = self.elttype.sizeof
         if size < 512:
-            self.buffer_size = int (512 / size)
+            self.buffer_size = 512 // size
         else:
             self.buffer_size = 1
 
-    def to_string(self):
+    def size(self):
         start = self.val['_M_impl']['_M_start']
         end = self.val['_M_impl']['_M_finish']
 
@@ -559,15 +962,48 @@ class StdDequePrinter:
         delta_s = start['_M_last'] - start['_M_cur']
         delta_e = end['_M_cur'] - end['_M_first']
 
-        size = self.buffer_size * delta_n + delta_s + delta_e
+        return int (self.buffer_size * delta_n + delta_s + delta_e)
+
+    def segments(self):
+        return self._segments(self.elttype, self.buffer_size,
+                              self.val['_M_impl']['_M_start'],
+                              self.val['_M_impl']['_M_finish'],
+                              memory.decodes(self.size()))
 
-        return '[%d]' % (int (size),)
+    def to_string(self):
+        return '[%d]' % (self.size (),)
+
+    def summary(self):
+        "Return the summary of the elements, or None if they are listed one by one."
+        size = self.size()
+        if not summary.applies(self.elttype, size):
+            return None
+        # Gather the used part of every buffer into one block.
+        segments = self.segments()
+        elt = self.elttype.sizeof
+        blocks = []
+        try:
+            index = 0
+            while index < size:
+                node, slot = segments.locate(index)
+                count = min(self.buffer_size - slot, size - index)
+                blocks.append(memory.read(segments.nodes[node] + slot * elt, count * elt))
+                index = index + count
+        except gdb.error:
+            return None
+        return summary.summarize(b''.join(blocks), memory.scalar_format(self.elttype), size)
 
     def children(self):
-        start = self.val['_M_impl']['_M_start']
-        end = self.val['_M_impl']['_M_finish']
-        return self._iter(start['_M_node'], start['_M_cur'], start['_M_last'],
-                          end['_M_cur'], self.buffer_size)
+        result = self.summary()
+        if result != None:
+            return summary.children(result, self.elttype)
+        return self._iter(self.segments(), 0, self.size())
+
+    def children_range(self, offset, count):
+        offset, count = paging.clamp(offset, count, self.size())
+        if count == 0:
+            return iter([])
+        return self._iter(self.segments(), offset, offset + count)
 
     def display_hint (self):
         return '#' + self.to_string()
@@ -588,6 +1024,24 @@ class StdStringPrinter:
         self.encoding = encoding
         self.val = val
 
+    @staticmethod
+    def rep_type (type):
+        "Return the pointer type of the COW _Rep header of TYPE, or None for the C++11 layout."
+        for field in type.fields ():
+            if field.name == '_M_string_length':
+                return None
+        return typecache.lookup_type (str (type) + '::_Rep').pointer ()
+
+    def length (self, type):
+        # Calculate the length of the string so that to_string returns
+        # the string according to length, not according to first null
+        # encountered.
+        reptype = typecache.layout ('std::basic_string', type, self.rep_type)
+        if reptype == None:
+            return int (self.val['_M_string_length'])
+        header = self.val['_M_dataplus']['_M_p'].cast (reptype) - 1
+        return int (header.dereference ()['_M_length'])
+
     def to_string(self):
         # Look up the target encoding as late as possible.
         encoding = self.encoding
@@ -600,110 +1054,327 @@ class StdStringPrinter:
         type = self.val.type
         if type.code == gdb.TYPE_CODE_REF:
             type = type.target ()
-
-        # Calculate the length of the string so that to_string returns
-        # the string according to length, not according to first null
-        # encountered.
-        ptr = self.val ['_M_dataplus']['_M_p']
         realtype = type.unqualified ().strip_typedefs ()
-        reptype = gdb.lookup_type (str (realtype) + '::_Rep').pointer ()
-        header = ptr.cast(reptype) - 1
-        len = header.dereference ()['_M_length']
+
+        # Read at most STRING_LIMIT characters in one transfer; a
+        # corrupt length must not make us read gigabytes.
+        ptr = self.val['_M_dataplus']['_M_p']
+        char_size = ptr.type.strip_typedefs ().target ().sizeof
         try:
-            if encoding == 'auto':
-                return self.val['_M_dataplus']['_M_p'].string (length = len)
-            else:
-                return self.val['_M_dataplus']['_M_p'].string (encoding, length = len)
-        except:
+            length = self.length (realtype)
+            count = max (0, min (length, settings.STRING_LIMIT))
+            data = memory.read (int (ptr), count * char_size)
+        except gdb.error:
             return '<Invalid value>'
+        ret = data.decode (memory.codec (encoding, char_size), 'replace')
+        if count < length:
+            ret += settings.ELIDED_MARKER
+        return ret
 
     def display_hint (self):
         return 'string'
 
+def find_field (type, name):
+    "Return (byte offset, type) of field NAME of TYPE or of its bases, or None."
+    for field in type.strip_typedefs ().fields ():
+        if field.name == name:
+            return (field.bitpos // 8, field.type)
+        if field.is_base_class:
+            found = find_field (field.type, name)
+            if found != None:
+                return (field.bitpos // 8 + found[0], found[1])
+    return None
+
 class Tr1HashtableIterator:
+    "Walk the nodes of a hash table, scanning its bucket array locally"
+
     def __init__ (self, hash):
+        self.hash = self.table (hash)
+        self.layout = typecache.layout ('hashtable', self.hash.type.strip_typedefs (),
+                                        self.table_layout)
+        self.size = int (self.hash['_M_element_count'])
+        self.bucket_count = int (self.hash['_M_bucket_count'])
+        self.buckets = None
+        # Position: the bucket holding the next node (tr1 layout only)
+        # and the address of the next node.
+        self.bucket = -1
+        self.node = None
         self.count = 0
-        self.n_buckets = hash['_M_element_count']
-        if self.n_buckets == 0:
-            self.node = False
-        else:
-            self.bucket = hash['_M_buckets']
-            self.node = self.bucket[0]
-            self.update ()
+
+    @staticmethod
+    def table (val):
+        "Return the _Hashtable of an unordered container."
+        # C++11 containers hold it in _M_h, tr1 ones derive from it.
+        try:
+            return val['_M_h']
+        except gdb.error:
+            pass
+        type = val.type.strip_typedefs ()
+        while type.tag != None and not re.search ('::_Hashtable<', type.tag):
+            bases = [field for field in type.fields () if field.is_base_class]
+            if not bases:
+                return val
+            type = bases[0].type.strip_typedefs ()
+        return val.cast (type)
+
+    @staticmethod
+    def node_type (table, valuetype):
+        "Return the node type of the C++11 layout, or None."
+        names = ['%s::__node_type' % table]
+        for cached in ('true', 'false'):
+            names.append ('std::__detail::_Hash_node<%s, %s>' % (valuetype, cached))
+        for name in names:
+            try:
+                return typecache.lookup_type (name)
+            except gdb.error:
+                pass
+        return None
+
+    @staticmethod
+    def table_layout (table):
+        """Return (C++11 layout, next link offset, value offset, pointer format,
+        pointer size, value type) for the _Hashtable type TABLE."""
+        valuetype = table.template_argument (1)
+        pointer = typecache.lookup_type ('void').pointer ()
+        format = memory.scalar_format (pointer)
+        if find_field (table, '_M_before_begin') != None:
+            # GCC 4.7 on: one singly linked list through _M_nxt, the
+            # first member of every node; each bucket points to the
+            # node before its first one.
+            value = None
+            nodetype = Tr1HashtableIterator.node_type (table, valuetype)
+            if nodetype != None:
+                for name in ('_M_storage', '_M_v'):
+                    found = find_field (nodetype, name)
+                    if found != None:
+                        value = found[0]
+                        break
+            if value == None:
+                # The value follows the link.
+                value = pointer.sizeof
+            return (True, 0, value, format, pointer.sizeof, valuetype)
+        # tr1 layout: each bucket heads a null terminated chain.
+        nodetype = find_field (table, '_M_buckets')[1].strip_typedefs ().target ().target ()
+        return (False, find_field (nodetype, '_M_next')[0], find_field (nodetype, '_M_v')[0],
+                format, pointer.sizeof, valuetype)
 
     def __iter__ (self):
         return self
 
-    def update (self):
-        # If we advanced off the end of the chain, move to the next
-        # bucket.
-        while self.node == 0:
-            self.bucket = self.bucket + 1
-            self.node = self.bucket[0]
-
-       # If we advanced off the end of the bucket array, then
-       # we're done.
-        if self.count == self.n_buckets:
-            self.node = False
-        else:
-            self.count = self.count + 1
+    def __len__ (self):
+        return self.size
+
+    def modern (self):
+        return self.layout[0]
+
+    def valuetype (self):
+        return self.layout[5]
+
+    def read_buckets (self):
+        "Return the bucket array as a list of addresses, read in one go."
+        if self.buckets == None:
+            count = min (self.bucket_count, settings.NODE_WALK_LIMIT)
+            size = self.layout[4]
+            data = memory.read (int (self.hash['_M_buckets']), count * size)
+            self.buckets = memory.decode (data, self.layout[3], count)
+        return self.buckets
+
+    def read_next (self, address):
+        "Return the address of the node linked from the node at ADDRESS."
+        modern, next, value, format, size, valuetype = self.layout
+        data = memory.read (address + next, size)
+        return struct.unpack_from (memory.endian () + format, data)[0]
+
+    def start (self):
+        if self.node == None:
+            if self.modern ():
+                self.node = int (self.hash['_M_before_begin']['_M_nxt'])
+            else:
+                self.node = 0
+
+    def seek (self, key, position):
+        "Move to element POSITION, resuming from the closest cursor remembered for KEY."
+        cursor = paging.cursors.get (key, position)
+        if cursor != None and cursor[0] >= self.count:
+            self.count = cursor[0]
+            self.bucket, self.node = cursor[1]
+        while self.count < position:
+            self.advance ()
+            if self.count % paging.CURSOR_INTERVAL == 0:
+                self.remember (key)
+
+    def remember (self, key):
+        "Remember the current position as a cursor for KEY."
+        if self.node != None and self.count < self.size:
+            paging.cursors.put (key, self.count, (self.bucket, self.node))
+
+    def advance (self):
+        "Return the address of the next node."
+        self.start ()
+        if self.count == self.size:
+            raise StopIteration
+        if not self.modern ():
+            # Skip the empty buckets without touching the inferior.
+            buckets = self.read_buckets ()
+            while not self.node:
+                self.bucket = self.bucket + 1
+                if self.bucket >= len (buckets):
+                    raise StopIteration
+                self.node = buckets[self.bucket]
+        elif not self.node:
+            raise StopIteration
+        node = self.node
+        self.node = self.read_next (node)
+        self.count = self.count + 1
+        return node
 
     def next (self):
-        if not self.node:
-            raise StopIteration
-        result = self.node.dereference()['_M_v']
-        self.node = self.node.dereference()['_M_next']
-        self.update ()
-        return result
+        return self.advance ()
+
+    def __next__ (self):
+        return self.advance ()
+
+    def value (self, address):
+        "Return the element stored in the node at ADDRESS."
+        pointer = self.valuetype ().pointer ()
+        return gdb.Value (address + self.layout[2]).cast (pointer).dereference ()
+
+    def chains (self):
+        "Return (used buckets, longest chain), walking every node once."
+        buckets = self.read_buckets ()
+        longest = 0
+        used = 0
+        if self.modern ():
+            # A chain starts at each node whose predecessor a bucket
+            # points to.
+            starts = set ([bucket for bucket in buckets if bucket])
+            previous = int (self.hash['_M_before_begin'].address)
+            node = int (self.hash['_M_before_begin']['_M_nxt'])
+            length = 0
+            walked = 0
+            while node and walked < self.size:
+                if previous in starts:
+                    used = used + 1
+                    length = 0
+                length = length + 1
+                longest = max (longest, length)
+                walked = walked + 1
+                previous = node
+                node = self.read_next (node)
+            return (used, longest)
+        walked = 0
+        for node in buckets:
+            if not node:
+                continue
+            used = used + 1
+            length = 0
+            while node and walked < self.size:
+                length = length + 1
+                walked = walked + 1
+                node = self.read_next (node)
+            longest = max (longest, length)
+        return (used, longest)
+
+    def describe (self, typename):
+        "Return the to_string of a container of TYPENAME with its load statistics."
+        result = '%s with %d elements' % (typename, self.size)
+        if self.bucket_count == 0:
+            return result
+        stats = 'load factor %.2f' % (float (self.size) / self.bucket_count)
+        if 0 < self.size <= settings.HASHTABLE_STATS_LIMIT:
+            try:
+                used, longest = self.chains ()
+                stats = stats + ', longest chain %d' % longest
+            except gdb.error:
+                pass
+        return '%s (%s)' % (result, stats)
 
 class Tr1UnorderedSetPrinter:
     "Print a tr1::unordered_set"
 
+    class _iter:
+        def __init__ (self, hashiter, count = 0):
+            self.hashiter = hashiter
+            self.count = count
+
+        def __iter__ (self):
+            return self
+
+        def advance (self):
+            item = self.hashiter.value (self.hashiter.advance ())
+            result = ('[%d]' % self.count, item)
+            self.count = self.count + 1
+            return result
+
+        def next (self):
+            return self.advance ()
+
+        def __next__ (self):
+            return self.advance ()
+
     def __init__ (self, typename, val):
         self.typename = typename
         self.val = val
 
     def to_string (self):
-        return '%s with %d elements' % (self.typename, self.val['_M_element_count'])
-
-    @staticmethod
-    def format_count (i):
-        return '[%d]' % i
+        return Tr1HashtableIterator (self.val).describe (self.typename)
 
     def children (self):
-        counter = itertools.imap (self.format_count, itertools.count())
-        return itertools.izip (counter, Tr1HashtableIterator (self.val))
+        return self._iter (Tr1HashtableIterator (self.val))
+
+    def children_range (self, offset, count):
+        hashiter = Tr1HashtableIterator (self.val)
+        offset, count = paging.clamp (offset, count, len (hashiter))
+        key = paging.container_key (self.val, self.typename)
+        hashiter.seek (key, offset)
+        return paging.Window (self._iter (hashiter, offset), count,
+                              lambda: hashiter.remember (key))
 
 class Tr1UnorderedMapPrinter:
     "Print a tr1::unordered_map"
 
+    class _iter:
+        def __init__ (self, hashiter, count = 0):
+            self.hashiter = hashiter
+            self.count = count
+
+        def __iter__ (self):
+            return self
+
+        def advance (self):
+            if self.count % 2 == 0:
+                self.pair = self.hashiter.value (self.hashiter.advance ())
+                item = self.pair['first']
+            else:
+                item = self.pair['second']
+            result = ('[%d]' % self.count, item)
+            self.count = self.count + 1
+            return result
+
+        def next (self):
+            return self.advance ()
+
+        def __next__ (self):
+            return self.advance ()
+
     def __init__ (self, typename, val):
         self.typename = typename
         self.val = val
 
     def to_string (self):
-        return '%s with %d elements' % (self.typename, self.val['_M_element_count'])
-
-    @staticmethod
-    def flatten (list):
-        for elt in list:
-            for i in elt:
-                yield i
-
-    @staticmethod
-    def format_one (elt):
-        return (elt['first'], elt['second'])
-
-    @staticmethod
-    def format_count (i):
-        return '[%d]' % i
+        return Tr1HashtableIterator (self.val).describe (self.typename)
 
     def children (self):
-        counter = itertools.imap (self.format_count, itertools.count())
-        # Map over the hash table and flatten the result.
-        data = self.flatten (itertools.imap (self.format_one, Tr1HashtableIterator (self.val)))
-        # Zip the two iterators together.
-        return itertools.izip (counter, data)
+        return self._iter (Tr1HashtableIterator (self.val))
+
+    def children_range (self, offset, count):
+        hashiter = Tr1HashtableIterator (self.val)
+        offset, count = paging.clamp (offset, count, len (hashiter))
+        key = paging.container_key (self.val, self.typename)
+        hashiter.seek (key, offset)
+        # Each element is a key child followed by a value child.
+        return paging.Window (self._iter (hashiter, 2 * offset), 2 * count,
+                              lambda: hashiter.remember (key))
 
     def display_hint (self):
         return 'map'
@@ -711,38 +1382,12 @@ class Tr1UnorderedMapPrinter:
 def register_libstdcxx_printers (obj):
     "Register libstdc++ pretty-printers with objfile Obj."
 
-    if obj == None:
-        obj = gdb
-
-    obj.pretty_printers.append (lookup_function)
+    registry.register (obj, 'libstdcxx', pretty_printers_dict)
 
 def lookup_function (val):
     "Look-up and return a pretty-printer that can print val."
 
-    # Get the type.
-    type = val.type
-
-    # If it points to a reference, get the reference.
-    if type.code == gdb.TYPE_CODE_REF:
-        type = type.target ()
-
-    # Get the unqualified type, stripped of typedefs.
-    type = type.unqualified ().strip_typedefs ()
-
-    # Get the type name.    
-    typename = type.tag
-    if typename == None:
-        return None
-
-    # Iterate over local dictionary of types to determine
-    # if a printer is registered for that type.  Return an
-    # instantiation of the printer if found.
-    for function in pretty_printers_dict:
-        if function.search (typename):
-            return pretty_printers_dict[function] (val)
-        
-    # Cannot find a pretty printer.  Return None.
-    return None
+    return libstdcxx_printers.lookup (val)
 
 def build_libstdcxx_dictionary ():
     # libstdc++ objects requiring pretty-printing.
@@ -752,9 +1397,14 @@ def build_libstdcxx_dictionary ():
     pretty_printers_dict[re.compile('^std::basic_string<wchar_t(,.*)?>$')] = lambda val: StdStringPrinter(1, val)
     pretty_printers_dict[re.compile('^std::basic_string<char16_t(,.*)?>$')] = lambda val: StdStringPrinter('UTF-16', val)
     pretty_printers_dict[re.compile('^std::basic_string<char32_t(,.*)?>$')] = lambda val: StdStringPrinter('UTF-32', val)
+    pretty_printers_dict[re.compile('^std::__cxx11::basic_string<char(,.*)?>$')] = lambda val: StdStringPrinter(0, val)
+    pretty_printers_dict[re.compile('^std::__cxx11::basic_string<wchar_t(,.*)?>$')] = lambda val: StdStringPrinter(1, val)
+    pretty_printers_dict[re.compile('^std::__cxx11::basic_string<char16_t(,.*)?>$')] = lambda val: StdStringPrinter('UTF-16', val)
+    pretty_printers_dict[re.compile('^std::__cxx11::basic_string<char32_t(,.*)?>$')] = lambda val: StdStringPrinter('UTF-32', val)
     pretty_printers_dict[re.compile('^std::bitset<.*>$')] = lambda val: StdBitsetPrinter("std::bitset", val)
     pretty_printers_dict[re.compile('^std::deque<.*>$')] = lambda val: StdDequePrinter("std::deque", val)
     pretty_printers_dict[re.compile('^std::list<.*>$')] = lambda val: StdListPrinter("std::list", val)
+    pretty_printers_dict[re.compile('^std::__cxx11::list<.*>$')] = lambda val: StdListPrinter("std::__cxx11::list", val)
     pretty_printers_dict[re.compile('^std::map<.*>$')] = lambda val: StdMapPrinter("std::map", val)
     pretty_printers_dict[re.compile('^std::multimap<.*>$')] = lambda val: StdMapPrinter("std::multimap", val)
     pretty_printers_dict[re.compile('^std::multiset<.*>$')] = lambda val: StdSetPrinter("std::multiset", val)
@@ -833,3 +1483,7 @@ def build_libstdcxx_dictionary ():
 pretty_printers_dict = {}
 
 build_libstdcxx_dictionary ()
+
+# Private index used when lookup_function is installed on its own.
+libstdcxx_printers = registry.PrinterRegistry (registry.CACHE_SIZE)
+libstdcxx_printers.add_family ('libstdcxx', pretty_printers_dict)
@@ -36,6 +36,8 @@
 
 import gdb
 import re
+
+from printerCore import registry
  
 class PointerPrinter:
     "Pretty Printer for pointers"
@@ -86,9 +88,11 @@ def find_pretty_printer(value):
     else:
        return None
 
+def make_pretty_printer(value, type):
+    "Create a printer for value of the stripped pointer type"
+    return PointerPrinter ( value )
+
 def register_pointer_printers(obj):
     "Register pointer printers."
-    if obj == None:
-        obj = gdb
-    obj.pretty_printers.append(find_pretty_printer)
+    registry.register(obj, 'pointers', code_printers = { gdb.TYPE_CODE_PTR: make_pretty_printer })
  
\ No newline at end of file
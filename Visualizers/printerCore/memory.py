@@ -0,0 +1,190 @@
+# Bulk reads of inferior memory for the C++ visualizers.
+
+# Walking a container element by element costs one or more round trips
+# into GDB (and often into a remote target) per element.  For elements
+# of scalar types the whole block can be read in a few transfers and
+# decoded locally instead; gdb.Value objects are then rebuilt from the
+# decoded numbers with casts, which do not touch the inferior.
+
+import gdb
+import codecs
+import struct
+
+from printerCore import settings
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Largest block read from the inferior in one transfer.
+READ_CHUNK = 1 << 20
+
+# Scalar type codes that can be decoded from raw bytes.
+SCALAR_CODES = frozenset ([gdb.TYPE_CODE_INT, gdb.TYPE_CODE_CHAR, gdb.TYPE_CODE_BOOL,
+                           gdb.TYPE_CODE_ENUM, gdb.TYPE_CODE_FLT, gdb.TYPE_CODE_PTR])
+
+# struct format characters of integers by size.
+INT_FORMATS = { 1: 'b', 2: 'h', 4: 'i', 8: 'q' }
+FLOAT_FORMATS = { 4: 'f', 8: 'd' }
+
+byte_order = None
+
+def endian ():
+    "Return the struct byte order prefix of the target."
+
+    global byte_order
+    if byte_order == None:
+        try:
+            shown = gdb.execute ('show endian', False, True)
+        except:
+            shown = ''
+        if 'big' in shown:
+            byte_order = '>'
+        else:
+            byte_order = '<'
+    return byte_order
+
+def reset (*args):
+    "Forget the byte order; a new objfile may target another architecture."
+
+    global byte_order
+    byte_order = None
+
+if hasattr (gdb, 'events'):
+    gdb.events.new_objfile.connect (reset)
+
+def is_signed (type):
+    "Return True if the integer type TYPE is signed."
+
+    if hasattr (type, 'is_signed'):
+        return type.is_signed
+    return int (gdb.Value (-1).cast (type)) < 0
+
+def scalar_format (type):
+    "Return the struct format character decoding one TYPE, or None."
+
+    type = type.unqualified ().strip_typedefs ()
+    if type.code not in SCALAR_CODES:
+        return None
+    if type.code == gdb.TYPE_CODE_FLT:
+        return FLOAT_FORMATS.get (type.sizeof)
+    format = INT_FORMATS.get (type.sizeof)
+    if format == None:
+        return None
+    if type.code in (gdb.TYPE_CODE_PTR, gdb.TYPE_CODE_BOOL) or not is_signed (type):
+        format = format.upper ()
+    return format
+
+def is_scalar (type):
+    return scalar_format (type) != None
+
+def read (address, length):
+    "Read LENGTH bytes at ADDRESS of the selected inferior and return them as a string."
+
+    inferior = gdb.selected_inferior ()
+    chunks = []
+    offset = 0
+    while offset < length:
+        size = min (READ_CHUNK, length - offset)
+        data = inferior.read_memory (address + offset, size)
+        if hasattr (data, 'tobytes'):
+            data = data.tobytes ()
+        else:
+            data = str (data)
+        chunks.append (data)
+        offset = offset + size
+    if len (chunks) == 1:
+        return chunks[0]
+    return b''.join (chunks)
+
+def decode (data, format, count, offset = 0):
+    "Decode COUNT scalars of struct FORMAT from DATA, starting at OFFSET."
+
+    if numpy != None:
+        dtype = numpy.dtype (endian () + format)
+        return numpy.frombuffer (data, dtype, count, offset).tolist ()
+    return list (struct.unpack_from ('%s%d%s' % (endian (), count, format), data, offset))
+
+def codec (charset, char_size):
+    "Return the Python codec decoding characters of CHAR_SIZE bytes in GDB charset CHARSET."
+
+    charset = str (charset or 'auto').lower ()
+    if charset == 'auto':
+        charset = { 2: 'utf-16', 4: 'utf-32' }.get (char_size, 'utf-8')
+    # Without a byte order mark Python would assume the host order.
+    if charset in ('utf-16', 'ucs-2', 'ucs2', 'utf-32', 'ucs-4', 'ucs4'):
+        if char_size == 2:
+            charset = 'utf-16'
+        else:
+            charset = 'utf-32'
+        if endian () == '>':
+            charset = charset + '-be'
+        else:
+            charset = charset + '-le'
+    try:
+        codecs.lookup (charset)
+    except LookupError:
+        charset = 'utf-8'
+    return charset
+
+def utf16_encoding ():
+    "Return the codec name of UTF-16 in the byte order of the target."
+
+    return codec ('utf-16', 2)
+
+def decode_utf16 (data, truncated):
+    """Decode the UTF-16 code units of DATA.
+
+    If TRUNCATED, DATA was cut short and a trailing high surrogate,
+    whose pair was not read, is dropped."""
+
+    if truncated and len (data) >= 2:
+        unit = struct.unpack_from (endian () + 'H', data, len (data) - 2)[0]
+        if 0xd800 <= unit <= 0xdbff:
+            data = data[:-2]
+    return data.decode (utf16_encoding (), 'replace')
+
+def decodes (count):
+    "Return True if a sequence of COUNT scalars should be decoded from bulk reads."
+
+    return settings.DECODE_THRESHOLD > 0 and count >= settings.DECODE_THRESHOLD
+
+def make_value (number, type):
+    "Rebuild a gdb.Value of TYPE from a decoded number without touching the inferior."
+
+    return gdb.Value (number).cast (type)
+
+class ScalarArray:
+    "Decode a contiguous array of scalars of the inferior in large blocks"
+
+    def __init__ (self, address, type, count):
+        self.address = address
+        self.type = type
+        self.count = count
+        self.format = scalar_format (type)
+        self.per_chunk = max (1, READ_CHUNK // type.sizeof)
+        self.base = 0
+        self.numbers = []
+
+    def __len__ (self):
+        return self.count
+
+    def load (self, index):
+        base = index - index % self.per_chunk
+        count = min (self.per_chunk, self.count - base)
+        data = read (self.address + base * self.type.sizeof, count * self.type.sizeof)
+        self.numbers = decode (data, self.format, count)
+        self.base = base
+
+    def number (self, index):
+        "Return element INDEX as a Python number."
+
+        if index < 0 or index >= self.count:
+            raise IndexError (index)
+        if index < self.base or index >= self.base + len (self.numbers):
+            self.load (index)
+        return self.numbers[index - self.base]
+
+    def __getitem__ (self, index):
+        return make_value (self.number (index), self.type)
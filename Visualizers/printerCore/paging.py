@@ -0,0 +1,119 @@
+# Windowed access to the children of large containers.
+
+# Container printers provide children_range (offset, count), which
+# returns the children of elements [offset, offset + count) only.
+# Random-access containers jump straight to the offset; node-based ones
+# resume from a cursor remembered at the end of the previous window.
+# Cursors hold inferior addresses, so they are dropped whenever the
+# inferior runs.
+
+import gdb
+import collections
+
+# Containers whose cursors are remembered.
+CURSOR_CACHE_SIZE = 64
+
+# Cursors remembered per container.
+CURSORS_PER_CONTAINER = 64
+
+# Long walks remember a cursor every CURSOR_INTERVAL elements.
+CURSOR_INTERVAL = 16384
+
+def clamp (offset, count, size):
+    "Restrict the window [offset, offset + count) to a container of SIZE elements."
+
+    offset = max (0, min (int (offset), int (size)))
+    count = max (0, min (int (count), int (size) - offset))
+    return (offset, count)
+
+def container_key (val, typename):
+    "Return the key identifying container VAL in the cursor cache, or None."
+
+    address = val.address
+    if address == None:
+        return None
+    return (int (address), typename)
+
+class Window:
+    "Iterate over at most COUNT children of an iterator, then call DONE"
+
+    def __init__ (self, iterator, count, done = None):
+        self.iterator = iterator
+        self.left = count
+        self.done = done
+
+    def __iter__ (self):
+        return self
+
+    def finish (self):
+        if self.done != None:
+            done = self.done
+            self.done = None
+            done ()
+
+    def advance (self):
+        if self.left <= 0:
+            self.finish ()
+            raise StopIteration
+        try:
+            item = next (self.iterator)
+        except StopIteration:
+            self.finish ()
+            raise
+        self.left = self.left - 1
+        if self.left == 0:
+            self.finish ()
+        return item
+
+    def next (self):
+        return self.advance ()
+
+    def __next__ (self):
+        return self.advance ()
+
+class CursorCache:
+    "Remember where walks over node-based containers stopped"
+
+    def __init__ (self, size, per_container):
+        self.size = size
+        self.per_container = per_container
+        self.containers = collections.OrderedDict ()
+
+    def clear (self, *args):
+        self.containers.clear ()
+
+    def get (self, key, position):
+        "Return the (position, state) cursor of KEY closest before POSITION, or None."
+
+        if key == None or key not in self.containers:
+            return None
+        best = None
+        for known in self.containers[key]:
+            if known <= position and (best == None or known > best):
+                best = known
+        if best == None:
+            return None
+        return (best, self.containers[key][best])
+
+    def put (self, key, position, state):
+        if key == None:
+            return
+        cursors = self.containers.pop (key, None)
+        if cursors == None:
+            if len (self.containers) >= self.size:
+                self.containers.popitem (last = False)
+            cursors = collections.OrderedDict ()
+        # Most recently used containers go last.
+        self.containers[key] = cursors
+        cursors.pop (position, None)
+        if len (cursors) >= self.per_container:
+            cursors.popitem (last = False)
+        cursors[position] = state
+
+cursors = CursorCache (CURSOR_CACHE_SIZE, CURSORS_PER_CONTAINER)
+
+if hasattr (gdb, 'events'):
+    gdb.events.cont.connect (cursors.clear)
+    gdb.events.exited.connect (cursors.clear)
+    if hasattr (gdb.events, 'memory_changed'):
+        gdb.events.memory_changed.connect (cursors.clear)
@@ -0,0 +1,181 @@
+# Printer registry shared by the C++ visualizers.
+
+# Every visualizer package (pointers, charArrays, libstdcxx, qt4, boost)
+# feeds its printers into one registry, and GDB is given a single lookup
+# function.  The type of a value is resolved once per lookup and the
+# printer is found through an index of outer template names, backed by
+# a bounded cache of type names that also remembers misses.
+
+import gdb
+import collections
+import functools
+
+from printerCore import snapshot
+
+class PrinterRegistry:
+    "Resolve the printers of several families through a single lookup"
+
+    # Characters that end the literal prefix of a pattern.
+    special = frozenset ('.^$*+?{}[]\\|()<')
+
+    def __init__ (self, cache_size):
+        self.cache_size = cache_size
+        # (name, printers, with_typename) in registration order.
+        self.families = []
+        # Type code -> [factory] for types without a tag.
+        self.code_printers = {}
+        self.rebuild ()
+
+    @staticmethod
+    def outer_name (pattern):
+        "Return the outer template name every match of PATTERN starts with, or None."
+
+        if not pattern.startswith ('^'):
+            return None
+        end = 1
+        while end < len (pattern) and pattern[end] not in PrinterRegistry.special:
+            end = end + 1
+        if end == len (pattern) or pattern[end] not in '<$':
+            return None
+        if pattern[end] == '$' and end != len (pattern) - 1:
+            return None
+        return pattern[1:end]
+
+    @staticmethod
+    def items (printers):
+        if hasattr (printers, 'items'):
+            return list (printers.items ())
+        return list (printers)
+
+    def has_family (self, name):
+        for family in self.families:
+            if family[0] == name:
+                return True
+        return False
+
+    def add_family (self, name, printers = (), with_typename = False, code_printers = None):
+        """Add the printers of family NAME, unless it is already registered.
+
+        PRINTERS maps compiled regular expressions matched against the
+        type tag to printer factories.  Factories are called with the
+        value, or with the type name and the value if WITH_TYPENAME is
+        set.  CODE_PRINTERS maps type codes of types without a tag to
+        factories called with the value and its stripped type; those
+        return None when they do not apply."""
+
+        if self.has_family (name):
+            return False
+        self.families.append ((name, printers, with_typename))
+        if code_printers:
+            for code in code_printers:
+                self.code_printers.setdefault (code, []).append (code_printers[code])
+        self.rebuild ()
+        return True
+
+    def size (self):
+        total = 0
+        for name, printers, with_typename in self.families:
+            total = total + len (printers)
+        return total
+
+    def rebuild (self):
+        "Index the printers by outer template name and forget cached results."
+
+        self.index = {}
+        self.generic = []
+        seq = 0
+        for name, printers, with_typename in self.families:
+            for regex, factory in self.items (printers):
+                entry = (seq, regex, factory, with_typename)
+                outer = self.outer_name (regex.pattern)
+                if outer == None:
+                    self.generic.append (entry)
+                else:
+                    self.index.setdefault (outer, []).append (entry)
+                seq = seq + 1
+        self.indexed = self.size ()
+        self.cache = collections.OrderedDict ()
+
+    def search (self, typename):
+        "Scan the candidates for TYPENAME in registration order."
+
+        candidates = self.index.get (typename.split ('<', 1)[0], [])
+        if self.generic:
+            candidates = sorted (candidates + self.generic)
+        for seq, regex, factory, with_typename in candidates:
+            if regex.search (typename):
+                if with_typename:
+                    return functools.partial (factory, typename)
+                return factory
+        return None
+
+    def find (self, typename):
+        "Return the printer factory for TYPENAME, or None."
+
+        # Families may add printers to their dictionaries later on.
+        if self.indexed != self.size ():
+            self.rebuild ()
+        try:
+            return self.cache[typename]
+        except KeyError:
+            pass
+        factory = self.search (typename)
+        # Remember negative results too; most values GDB asks about
+        # have no printer at all.
+        if len (self.cache) >= self.cache_size:
+            self.cache.popitem (last = False)
+        self.cache[typename] = factory
+        return factory
+
+    def lookup (self, val):
+        "Look-up and return a pretty-printer that can print val."
+
+        type = val.type
+
+        # If it points to a reference, get the reference.  Printers
+        # selected by type code never applied to references.
+        is_ref = type.code == gdb.TYPE_CODE_REF
+        if is_ref:
+            type = type.target ()
+
+        # Get the unqualified type, stripped of typedefs.
+        type = type.unqualified ().strip_typedefs ()
+
+        typename = type.tag
+        if typename != None:
+            factory = self.find (typename)
+            if factory == None:
+                return None
+            printer = factory (val)
+            if printer == None:
+                return None
+            return snapshot.wrap (printer, val, typename)
+
+        if is_ref:
+            return None
+        for factory in self.code_printers.get (type.code, ()):
+            printer = factory (val, type)
+            if printer != None:
+                return printer
+        return None
+
+# Type names remembered by the registry, including the ones that have
+# no printer.
+CACHE_SIZE = 4096
+
+registry = PrinterRegistry (CACHE_SIZE)
+
+def lookup_function (val):
+    "Look-up and return a pretty-printer that can print val."
+
+    return registry.lookup (val)
+
+def register (obj, name, printers = (), with_typename = False, code_printers = None):
+    "Add a printer family to the shared registry and install its lookup on OBJ."
+
+    if obj == None:
+        obj = gdb
+
+    registry.add_family (name, printers, with_typename, code_printers)
+    if lookup_function not in obj.pretty_printers:
+        obj.pretty_printers.append (lookup_function)
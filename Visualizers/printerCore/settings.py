@@ -0,0 +1,67 @@
+# Tunables of the C++ visualizers.
+
+# Front ends may assign new values at run time, for instance from a GDB
+# script:
+#
+#   python import printerCore.settings; printerCore.settings.STRING_LIMIT = 1 << 20
+
+# Sequences of at least this many scalars (vectors, deques, QLists,
+# tuples) have their elements decoded from bulk reads.  Such children
+# are plain values, not lvalues: they cannot be assigned in a watch
+# window and have no address.  0 turns decoding off.
+DECODE_THRESHOLD = 10000
+
+# Most characters a string printer reads from the inferior.
+STRING_LIMIT = 65536
+
+# Appended to strings cut at STRING_LIMIT.
+ELIDED_MARKER = '...'
+
+# Serve to_string and children from a cache for as long as the
+# inferior stays stopped.
+SNAPSHOT_CACHE = True
+
+# Keep cached results across stops while the bytes of the container
+# object are unchanged.  Elements stored outside the object may have
+# changed meanwhile, so this is off by default.
+SNAPSHOT_ACROSS_STOPS = False
+
+# Containers whose results are cached.
+SNAPSHOT_CACHE_SIZE = 1024
+
+# Containers with more children than this are not cached.
+SNAPSHOT_CHILDREN_LIMIT = 10000
+
+# Most nodes followed when a linked container does not record its size.
+NODE_WALK_LIMIT = 1 << 24
+
+# Most nodes counted to describe such a container in to_string, one
+# read per node on every refresh; 0, the default, leaves the count out.
+LIST_COUNT_LIMIT = 0
+
+# Largest hash table whose chains are walked to report the longest one
+# in to_string, one read per node on every refresh; 0, the default,
+# leaves the walk out.  Tr1HashtableIterator.chains () gives the
+# statistics on demand.
+HASHTABLE_STATS_LIMIT = 0
+
+# Runs of set bits listed in the to_string of a bitset.
+BITSET_RUNS_SHOWN = 8
+
+# Sequences of scalars longer than this show a summary (min, max, mean,
+# runs of equal values) as their children; 0, the default, turns
+# summaries off.  The elements of a summarized sequence are then only
+# reachable through children_range, which GDB/MI front ends do not call.
+SUMMARY_THRESHOLD = 0
+
+# Runs of equal values listed in a summary.
+SUMMARY_RUNS_SHOWN = 16
+
+# Names of application types declared Q_MOVABLE_TYPE, which QList
+# stores in place when they fit in a pointer.
+QLIST_MOVABLE_TYPES = []
+
+# Show vectors, QLists and iterator ranges of plain structs as one child
+# per field, describing that column, instead of one child per record.
+# The printers' table () method gives the columns themselves.
+TABLE_CHILDREN = False
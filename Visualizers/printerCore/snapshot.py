@@ -0,0 +1,169 @@
+# Per-stop snapshots of printer results for the C++ visualizers.
+
+# Front ends refresh every watch after each step and the printers
+# re-read the same containers from scratch.  Printers returned by the
+# registry are wrapped so that to_string and children are computed once
+# per (address, type, stop generation).  The cache is dropped whenever
+# the inferior stops or continues, unless SNAPSHOT_ACROSS_STOPS is set:
+# entries then survive while the bytes of the container object itself
+# (its header, not the elements it points to) are unchanged.  Memory
+# written from GDB (set var, watch window edits) always drops the cache.
+
+import gdb
+import collections
+import itertools
+
+from printerCore import memory
+from printerCore import settings
+
+class Snapshot:
+    "Results of one printer, valid for one stop generation"
+
+    def __init__ (self, generation, header):
+        self.generation = generation
+        self.header = header
+        self.string = None
+        self.has_string = False
+        # The children GDB consumed so far, the printer's iterator they
+        # came from, and whether it is exhausted.  Past
+        # SNAPSHOT_CHILDREN_LIMIT children the container is large and
+        # later walks go to the printer.
+        self.children = []
+        self.source = None
+        self.complete = False
+        self.large = False
+
+class SnapshotCache:
+    "Snapshots keyed by container address and type name"
+
+    def __init__ (self, size):
+        self.size = size
+        self.generation = 0
+        self.entries = collections.OrderedDict ()
+
+    def new_generation (self, *args):
+        self.generation = self.generation + 1
+        if not settings.SNAPSHOT_ACROSS_STOPS:
+            self.entries.clear ()
+
+    def memory_changed (self, *args):
+        # The write may be to an element, which the header does not
+        # cover.
+        self.generation = self.generation + 1
+        self.entries.clear ()
+
+    def header (self, address, type):
+        "Return the bytes of the container object, or None if unreadable."
+
+        try:
+            return memory.read (address, type.sizeof)
+        except gdb.error:
+            return None
+
+    def entry (self, val, typename):
+        "Return the snapshot of VAL printed as TYPENAME, or None if VAL has no address."
+
+        address = val.address
+        if address == None:
+            return None
+        key = (int (address), typename)
+        entry = self.entries.get (key)
+        if entry != None and entry.generation != self.generation:
+            # Reuse the results of an earlier stop only if the object
+            # was not touched since.
+            if (settings.SNAPSHOT_ACROSS_STOPS and entry.header != None
+                and entry.header == self.header (int (address), val.type)):
+                entry.generation = self.generation
+            else:
+                del self.entries[key]
+                entry = None
+        if entry == None:
+            header = None
+            if settings.SNAPSHOT_ACROSS_STOPS:
+                header = self.header (int (address), val.type)
+            entry = Snapshot (self.generation, header)
+            if len (self.entries) >= self.size:
+                self.entries.popitem (last = False)
+            self.entries[key] = entry
+        return entry
+
+class SnapshotPrinter:
+    "Serve to_string and children of a printer from its snapshot"
+
+    def __init__ (self, printer, entry):
+        self.printer = printer
+        self.entry = entry
+
+    # to_string and children are looked up here so that GDB still sees
+    # exactly the methods the wrapped printer has.
+    def __getattr__ (self, name):
+        attribute = getattr (self.printer, name)
+        if name == 'to_string':
+            return self.cached_to_string
+        if name == 'children':
+            return self.cached_children
+        return attribute
+
+    def cached_to_string (self):
+        if not self.entry.has_string:
+            self.entry.string = self.printer.to_string ()
+            self.entry.has_string = True
+        return self.entry.string
+
+    def cached_children (self):
+        entry = self.entry
+        if entry.large:
+            return iter (self.printer.children ())
+        if entry.source == None and not entry.complete:
+            entry.source = iter (self.printer.children ())
+        return self.replay (entry)
+
+    def replay (self, entry):
+        # Children are recorded only as GDB consumes them, so a display
+        # stopped early by 'print elements' or an MI range costs no more
+        # than without the cache.
+        index = 0
+        while True:
+            if index < len (entry.children):
+                yield entry.children[index]
+                index = index + 1
+                continue
+            if entry.complete:
+                return
+            if entry.large or len (entry.children) >= settings.SNAPSHOT_CHILDREN_LIMIT:
+                # Large containers are not kept; their children are
+                # paged instead.
+                entry.large = True
+                source = entry.source
+                entry.source = None
+                if source == None:
+                    # Another walk took the printer's iterator.
+                    source = itertools.islice (iter (self.printer.children ()), index, None)
+                for child in source:
+                    yield child
+                return
+            try:
+                child = next (entry.source)
+            except StopIteration:
+                entry.complete = True
+                entry.source = None
+                return
+            entry.children.append (child)
+
+cache = SnapshotCache (settings.SNAPSHOT_CACHE_SIZE)
+
+def wrap (printer, val, typename):
+    "Return PRINTER, serving its results from the snapshot of VAL when enabled."
+
+    if not settings.SNAPSHOT_CACHE:
+        return printer
+    entry = cache.entry (val, typename)
+    if entry == None:
+        return printer
+    return SnapshotPrinter (printer, entry)
+
+if hasattr (gdb, 'events'):
+    gdb.events.stop.connect (cache.new_generation)
+    gdb.events.cont.connect (cache.new_generation)
+    if hasattr (gdb.events, 'memory_changed'):
+        gdb.events.memory_changed.connect (cache.memory_changed)
@@ -0,0 +1,137 @@
+# Summaries of large numeric sequences for the C++ visualizers.
+
+# Expanding a sequence of millions of scalars sends millions of children
+# to the front end.  When SUMMARY_THRESHOLD is set (it is off by
+# default), sequence printers decode the elements of longer sequences
+# from a bulk read and their children become a summary instead: count,
+# min, max, mean, NaN count and the runs of equal values.  The elements
+# themselves stay reachable through children_range.
+
+import gdb
+import struct
+
+from printerCore import memory
+from printerCore import settings
+
+def applies (type, count):
+    "Return True if a sequence of COUNT elements of TYPE should be summarized."
+
+    return (settings.SUMMARY_THRESHOLD > 0 and count > settings.SUMMARY_THRESHOLD
+            and memory.is_scalar (type))
+
+class Summary:
+    "Statistics of a sequence of scalars"
+
+    def __init__ (self, count):
+        self.count = count
+        self.minimum = None
+        self.maximum = None
+        self.mean = None
+        self.nans = 0
+        # (first index, length, value) of the first runs of equal
+        # values, and the number of runs.
+        self.runs = []
+        self.run_count = 0
+
+def same (a, b):
+    # NaNs compare unequal, yet a run of NaNs is still a run.
+    return a == b or (a != a and b != b)
+
+def summarize_numbers (numbers):
+    "Return the Summary of a list of Python numbers."
+
+    summary = Summary (len (numbers))
+    total = 0
+    known = 0
+    first = 0
+    for index, number in enumerate (numbers):
+        if number != number:
+            summary.nans = summary.nans + 1
+        else:
+            if summary.minimum == None or number < summary.minimum:
+                summary.minimum = number
+            if summary.maximum == None or number > summary.maximum:
+                summary.maximum = number
+            total = total + number
+            known = known + 1
+        if index > 0 and not same (number, numbers[index - 1]):
+            add_run (summary, first, index - first, numbers[first])
+            first = index
+    if numbers:
+        add_run (summary, first, len (numbers) - first, numbers[first])
+    if known:
+        summary.mean = float (total) / known
+    return summary
+
+def add_run (summary, first, length, value):
+    summary.run_count = summary.run_count + 1
+    if len (summary.runs) < settings.SUMMARY_RUNS_SHOWN:
+        summary.runs.append ((first, length, value))
+
+def summarize_array (array):
+    "Return the Summary of a one-dimensional numpy array."
+
+    numpy = memory.numpy
+    summary = Summary (len (array))
+    if len (array) == 0:
+        return summary
+    if array.dtype.kind == 'f':
+        nan = numpy.isnan (array)
+        summary.nans = int (numpy.count_nonzero (nan))
+        known = array[~nan]
+        changes = (array[1:] != array[:-1]) & ~(nan[1:] & nan[:-1])
+    else:
+        known = array
+        changes = array[1:] != array[:-1]
+    if len (known):
+        summary.minimum = known.min ().item ()
+        summary.maximum = known.max ().item ()
+        summary.mean = float (known.mean (dtype = numpy.float64))
+    starts = numpy.concatenate (([0], numpy.flatnonzero (changes) + 1))
+    summary.run_count = len (starts)
+    for first, last in zip (starts[:settings.SUMMARY_RUNS_SHOWN].tolist (),
+                            starts[1:settings.SUMMARY_RUNS_SHOWN + 1].tolist () + [len (array)]):
+        summary.runs.append ((first, last - first, array[first].item ()))
+    return summary
+
+def summarize (data, format, count, stride = None, offset = 0):
+    """Return the Summary of COUNT scalars of struct FORMAT in the bytes DATA.
+
+    Elements start at OFFSET and are STRIDE bytes apart, packed by
+    default."""
+
+    size = struct.calcsize (format)
+    if stride == None:
+        stride = size
+    if memory.numpy != None:
+        dtype = memory.numpy.dtype (memory.endian () + format)
+        array = memory.numpy.ndarray ((count,), dtype, data, offset, (stride,))
+        return summarize_array (array)
+    if stride == size:
+        numbers = memory.decode (data, format, count, offset)
+    else:
+        format = memory.endian () + format
+        numbers = [struct.unpack_from (format, data, offset + index * stride)[0]
+                   for index in range (count)]
+    return summarize_numbers (numbers)
+
+def children (summary, type):
+    "Return the children standing for the elements of a summarized sequence of TYPE."
+
+    result = [('count', summary.count)]
+    if summary.minimum != None:
+        result.append (('min', memory.make_value (summary.minimum, type)))
+        result.append (('max', memory.make_value (summary.maximum, type)))
+        result.append (('mean', summary.mean))
+    if type.strip_typedefs ().code == gdb.TYPE_CODE_FLT:
+        result.append (('NaN count', summary.nans))
+    result.append (('runs', summary.run_count))
+    for first, length, value in summary.runs:
+        if length == 1:
+            name = '[%d]' % first
+        else:
+            name = '[%d-%d]' % (first, first + length - 1)
+        result.append ((name, memory.make_value (value, type)))
+    if summary.run_count > len (summary.runs):
+        result.append ((settings.ELIDED_MARKER, '%d more runs' % (summary.run_count - len (summary.runs))))
+    return result
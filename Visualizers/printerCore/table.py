@@ -0,0 +1,126 @@
+# Column views of arrays of records for the C++ visualizers.
+
+# An array of plain structs is otherwise shown as one gdb.Value per
+# element, whose fields the front end then fetches one at a time.  A
+# Table reads the whole block once and decodes each scalar field, found
+# from the gdb.Type.fields () offsets, as a column of Python numbers.
+
+import gdb
+import collections
+
+from printerCore import memory
+from printerCore import settings
+from printerCore import summary
+from printerCore import typecache
+
+def record_layout (type):
+    """Return the columns of records of TYPE as a list of (name, offset, type, format).
+
+    Nested structs and base classes are flattened into dotted names;
+    bit-fields, static members and fields that are not scalars are left
+    out."""
+
+    return typecache.layout ('record', type.strip_typedefs (), compute_layout)
+
+def compute_layout (type, prefix = '', base = 0):
+    columns = []
+    if type.code not in (gdb.TYPE_CODE_STRUCT, gdb.TYPE_CODE_UNION):
+        return columns
+    for field in type.fields ():
+        if not hasattr (field, 'bitpos') or field.bitsize:
+            continue
+        offset = base + field.bitpos // 8
+        fieldtype = field.type.strip_typedefs ()
+        if field.is_base_class:
+            columns.extend (compute_layout (fieldtype, prefix, offset))
+        elif fieldtype.code in (gdb.TYPE_CODE_STRUCT, gdb.TYPE_CODE_UNION):
+            columns.extend (compute_layout (fieldtype, prefix + field.name + '.', offset))
+        elif field.name and memory.is_scalar (fieldtype):
+            columns.append ((prefix + field.name, offset, field.type, memory.scalar_format (fieldtype)))
+    return columns
+
+def supports (type):
+    "Return True if arrays of TYPE can be shown as tables."
+
+    type = type.strip_typedefs ()
+    return (type.code == gdb.TYPE_CODE_STRUCT and type.sizeof > 0
+            and len (record_layout (type)) > 0)
+
+class Table:
+    "The scalar fields of COUNT records of TYPE, STRIDE bytes apart in DATA, as columns"
+
+    def __init__ (self, type, count, data, stride = None):
+        self.type = type
+        self.count = count
+        self.data = data
+        self.stride = stride or type.sizeof
+        self.layout = record_layout (type)
+
+    def names (self):
+        return [column[0] for column in self.layout]
+
+    def find (self, name):
+        for column in self.layout:
+            if column[0] == name:
+                return column
+        raise KeyError (name)
+
+    def column (self, name):
+        "Return the values of field NAME of every record, as a list of numbers."
+
+        name, offset, type, format = self.find (name)
+        stride = self.stride
+        if memory.numpy != None:
+            dtype = memory.numpy.dtype (memory.endian () + format)
+            array = memory.numpy.ndarray ((self.count,), dtype, self.data, offset, (stride,))
+            return array.tolist ()
+        return [memory.decode (self.data, format, 1, offset + index * stride)[0]
+                for index in range (self.count)]
+
+    def columns (self):
+        "Return an OrderedDict of every column by field name."
+
+        result = collections.OrderedDict ()
+        for name in self.names ():
+            result[name] = self.column (name)
+        return result
+
+    def summary (self, name):
+        "Return the printerCore.summary.Summary of column NAME."
+
+        name, offset, type, format = self.find (name)
+        return summary.summarize (self.data, format, self.count, self.stride, offset)
+
+    def describe (self, name):
+        "Return a one-line description of column NAME."
+
+        result = self.summary (name)
+        if result.minimum == None:
+            text = '%d values' % result.count
+        else:
+            text = '%d values, min %s, max %s, mean %s' % (result.count, result.minimum,
+                                                           result.maximum, result.mean)
+        if result.nans:
+            text = text + ', %d NaN' % result.nans
+        return text
+
+    def children (self):
+        "Return one child per column, describing it."
+
+        return [(name, self.describe (name)) for name in self.names ()]
+
+def read (address, type, count):
+    "Return the Table of COUNT contiguous records of TYPE at ADDRESS."
+
+    return Table (type, count, memory.read (address, count * type.sizeof))
+
+def gather (addresses, type):
+    "Return the Table of the records of TYPE at each of ADDRESSES."
+
+    return Table (type, len (addresses),
+                  b''.join ([memory.read (address, type.sizeof) for address in addresses]))
+
+def applies (type):
+    "Return True if the children of arrays of TYPE should be table columns."
+
+    return settings.TABLE_CHILDREN and supports (type)
@@ -0,0 +1,60 @@
+# Memoized type lookups for the C++ visualizers.
+
+# gdb.lookup_type searches the symbol tables and is among the slowest
+# calls a printer makes, yet printers ask for the same node types for
+# every element.  Results, failures included, are cached by type name
+# until an objfile is loaded or unloaded.
+
+import gdb
+import sys
+
+cache = {}
+
+# Cached failure; the lookup is retried only after the cache is cleared.
+class LookupFailure:
+    def __init__ (self, message):
+        self.message = message
+
+def lookup_type (name):
+    "Return the gdb.Type named NAME, like gdb.lookup_type, through the cache."
+
+    name = str (name)
+    try:
+        found = cache[name]
+    except KeyError:
+        try:
+            found = gdb.lookup_type (name)
+        except gdb.error:
+            found = LookupFailure (str (sys.exc_info ()[1]))
+        cache[name] = found
+    if isinstance (found, LookupFailure):
+        raise gdb.error (found.message)
+    return found
+
+def layout (kind, type, compute):
+    """Return COMPUTE (TYPE), remembered per KIND and type name.
+
+    Printers use this for the layout facts they derive from a type,
+    which stay valid exactly as long as the cached types."""
+
+    key = (kind, str (type))
+    try:
+        return cache[key]
+    except KeyError:
+        found = compute (type)
+        cache[key] = found
+        return found
+
+def pointer_size ():
+    "Return sizeof (void *) of the inferior."
+
+    return lookup_type ('void').pointer ().sizeof
+
+def clear (*args):
+    cache.clear ()
+
+if hasattr (gdb, 'events'):
+    gdb.events.new_objfile.connect (clear)
+    for name in ('clear_objfiles', 'free_objfile'):
+        if hasattr (gdb.events, name):
+            getattr (gdb.events, name).connect (clear)
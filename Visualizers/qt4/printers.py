@@ -19,6 +19,15 @@
 import gdb
 import itertools
 import re
+import struct
+
+from printerCore import memory
+from printerCore import paging
+from printerCore import registry
+from printerCore import settings
+from printerCore import summary
+from printerCore import table
+from printerCore import typecache
 
 class QStringPrinter:
 
@@ -26,11 +35,17 @@ class QStringPrinter:
         self.val = val
 
     def to_string(self):
-        ret = ""
-        i = 0
-        while i < self.val['d']['size']:
-            ret += chr(self.val['d']['data'][i])
-            i = i + 1
+        # Read at most STRING_LIMIT UTF-16 code units in one transfer.
+        d = self.val['d']
+        size = max(0, int(d['size']))
+        count = min(size, settings.STRING_LIMIT)
+        try:
+            data = memory.read(int(d['data']), count * 2)
+        except gdb.error:
+            return '<Invalid value>'
+        ret = memory.decode_utf16(data, count < size)
+        if count < size:
+            ret += settings.ELIDED_MARKER
         return ret
 
     def display_hint (self):
@@ -73,45 +88,50 @@ class QByteArrayPrinter:
     def display_hint (self):
         return 'string'
 
+# Element types declared Q_MOVABLE_TYPE by Qt, which QList stores in
+# place when they fit in a node.  QTypeInfo<T>::isStatic is inlined
+# away, so it has to be listed here; settings.QLIST_MOVABLE_TYPES adds
+# the application's own.
+MOVABLE_TYPES = frozenset(['QRect', 'QRectF', 'QString', 'QMargins', 'QLocale', 'QChar', 'QDate', 'QTime', 'QDateTime', 'QVector',
+    'QRegExpr', 'QPoint', 'QPointF', 'QByteArray', 'QSize', 'QSizeF', 'QBitArray', 'QLine', 'QLineF', 'QModelIndex', 'QPersitentModelIndex',
+    'QVariant', 'QFileInfo', 'QUrl', 'QXmlStreamAttribute', 'QXmlStreamNamespaceDeclaration', 'QXmlStreamNotationDeclaration',
+    'QXmlStreamEntityDeclaration'])
+
+# Q_PRIMITIVE_TYPE builtins; pointers are never static either.
+PRIMITIVE_CODES = frozenset([gdb.TYPE_CODE_INT, gdb.TYPE_CODE_CHAR, gdb.TYPE_CODE_BOOL,
+                             gdb.TYPE_CODE_FLT, gdb.TYPE_CODE_PTR])
+
 class QListPrinter:
     "Print a QList"
 
     class _iterator:
-        def __init__(self, nodetype, d):
-            self.nodetype = nodetype
-            self.d = d
-            self.count = 0
+        def __init__(self, layout, itype, slots, count = 0):
+            self.indirect, self.format = layout
+            self.pointer = itype.pointer()
+            self.itype = itype
+            self.slots = slots
+            self.count = count
+            if not memory.decodes(len(slots)):
+                # In place elements start at their node.
+                self.format = None
 
         def __iter__(self):
             return self
 
         def advance(self):
-            if self.count >= self.d['end'] - self.d['begin']:
+            if self.count >= len(self.slots):
                 raise StopIteration
             count = self.count
-            array = self.d['array'][self.d['begin'] + count]
-
-            #from QTypeInfo::isLarge
-            isLarge = self.nodetype.sizeof > gdb.lookup_type('void').pointer().sizeof
-            isPointer = self.nodetype.code == gdb.TYPE_CODE_PTR
-
-            #unfortunately we can't use QTypeInfo<T>::isStatic as it's all inlined, so use
-            #this list of types that use Q_DECLARE_TYPEINFO(T, Q_MOVABLE_TYPE)
-            #(obviously it won't work for custom types)
-            movableTypes = ['QRect', 'QRectF', 'QString', 'QMargins', 'QLocale', 'QChar', 'QDate', 'QTime', 'QDateTime', 'QVector',
-                'QRegExpr', 'QPoint', 'QPointF', 'QByteArray', 'QSize', 'QSizeF', 'QBitArray', 'QLine', 'QLineF', 'QModelIndex', 'QPersitentModelIndex',
-                'QVariant', 'QFileInfo', 'QUrl', 'QXmlStreamAttribute', 'QXmlStreamNamespaceDeclaration', 'QXmlStreamNotationDeclaration',
-                'QXmlStreamEntityDeclaration']
-            if movableTypes.count(self.nodetype.tag):
-                isStatic = False
-            else:
-                isStatic = not(isPointer)
-            if isLarge or isStatic: #see QList::Node::t()
-                node = array.cast(gdb.lookup_type('QList<%s>::Node' % self.nodetype).pointer())
-            else:
-                node = array.cast(gdb.lookup_type('QList<%s>::Node' % self.nodetype))
             self.count = self.count + 1
-            return ('[%d]' % count, node['v'].cast(self.nodetype))
+            if self.indirect:
+                # The node points to a heap copy of the element.
+                address = self.slots.number(count)
+            elif self.format != None:
+                # A scalar stored in the node itself.
+                return ('[%d]' % count, memory.make_value(self.slots.element(count, self.format), self.itype))
+            else:
+                address = self.slots.address + count * self.slots.type.sizeof
+            return ('[%d]' % count, gdb.Value(address).cast(self.pointer).dereference())
 
         def next(self):
             return self.advance()
@@ -119,15 +139,99 @@ class QListPrinter:
         def __next__(self):
             return self.advance()
 
+    # The node slots d->array[begin..end), read in large blocks.
+    class _slots(memory.ScalarArray):
+        def element(self, index, format):
+            "Return the scalar of struct FORMAT stored at the start of slot INDEX."
+            slot = struct.pack(memory.endian() + self.format, self.number(index))
+            return struct.unpack_from(memory.endian() + format, slot)[0]
+
     def __init__(self, val, itype):
         self.val = val
         if itype == None:
             self.itype = self.val.type.template_argument(0)
         else:
-            self.itype = gdb.lookup_type(itype)
+            self.itype = typecache.lookup_type(itype)
+
+    @staticmethod
+    def indirect(nodetype):
+        "Return True if the nodes of a QList hold pointers to the elements."
+        #from QTypeInfo::isLarge
+        isLarge = nodetype.sizeof > typecache.pointer_size()
+        stripped = nodetype.strip_typedefs()
+        if stripped.code in PRIMITIVE_CODES:
+            isStatic = False
+        else:
+            isStatic = not (nodetype.tag in MOVABLE_TYPES or stripped.tag in MOVABLE_TYPES
+                            or str(nodetype) in settings.QLIST_MOVABLE_TYPES
+                            or str(stripped) in settings.QLIST_MOVABLE_TYPES)
+        return isLarge or isStatic #see QList::Node::t()
+
+    @staticmethod
+    def node_layout(itype):
+        "Return (indirect, scalar format or None) for elements of ITYPE."
+        if QListPrinter.indirect(itype):
+            return (True, None)
+        # Elements stored in place start at the node itself.
+        return (False, memory.scalar_format(itype))
+
+    def layout(self):
+        # Keyed on the movable types too, as they may be changed at run time.
+        key = '%s|%s' % (self.itype, ','.join(settings.QLIST_MOVABLE_TYPES))
+        return typecache.layout('QList', key, lambda key: self.node_layout(self.itype))
+
+    def slots(self):
+        "Return the node slots d->array[begin..end)."
+        d = self.val['d']
+        begin = int(d['begin'])
+        voidptr = typecache.lookup_type('void').pointer()
+        address = int(d['array'].address) + begin * voidptr.sizeof
+        return self._slots(address, voidptr, int(d['end']) - begin)
+
+    def summary(self):
+        "Return the summary of the elements, or None if they are listed one by one."
+        slots = self.slots()
+        if not summary.applies(self.itype, len(slots)):
+            return None
+        indirect = self.layout()[0]
+        format = memory.scalar_format(self.itype)
+        try:
+            data = memory.read(slots.address, len(slots) * slots.type.sizeof)
+            if not indirect:
+                return summary.summarize(data, format, len(slots), slots.type.sizeof)
+            # Each slot points to its element.
+            pointers = memory.decode(data, slots.format, len(slots))
+            data = b''.join([memory.read(pointer, self.itype.sizeof) for pointer in pointers])
+            return summary.summarize(data, format, len(slots))
+        except gdb.error:
+            return None
+
+    def table(self):
+        "Return the elements as a printerCore.table.Table, or None if they are not records."
+        if not table.supports(self.itype):
+            return None
+        slots = self.slots()
+        if not self.layout()[0]:
+            # Records stored in place start at their slots.
+            data = memory.read(slots.address, len(slots) * slots.type.sizeof)
+            return table.Table(self.itype, len(slots), data, slots.type.sizeof)
+        return table.gather([slots.number(index) for index in range(len(slots))], self.itype)
 
     def children(self):
-        return self._iterator(self.itype, self.val['d'])
+        result = self.summary()
+        if result != None:
+            return summary.children(result, self.itype)
+        if table.applies(self.itype):
+            try:
+                return self.table().children()
+            except gdb.error:
+                pass
+        return self._iterator(self.layout(), self.itype, self.slots())
+
+    def children_range(self, offset, count):
+        slots = self.slots()
+        offset, count = paging.clamp(offset, count, len(slots))
+        return paging.Window(self._iterator(self.layout(), self.itype, slots, offset), count)
 
     def to_string(self):
         if self.val['d']['end'] == self.val['d']['begin']:
@@ -137,50 +241,78 @@ class QListPrinter:
 
         return "%sQList<%s>" % ( empty , self.itype )
 
+def qstring_units(val):
+    "Return the UTF-16 code units of the QString VAL as a tuple."
+    d = val['d']
+    size = int(d['size'])
+    data = memory.read(int(d['data']), size * 2)
+    return tuple(memory.decode(data, 'H', size))
+
+def comparable_key(ktype):
+    "Return True if keys of KTYPE can be read by read_key."
+    return ktype.strip_typedefs().tag == 'QString' or memory.is_scalar(ktype)
+
+def read_key(address, ktype):
+    "Return the key of type KTYPE at ADDRESS as a Python value."
+    if ktype.strip_typedefs().tag == 'QString':
+        return qstring_units(gdb.Value(address).cast(ktype.pointer()).dereference())
+    return memory.decode(memory.read(address, ktype.sizeof), memory.scalar_format(ktype), 1)[0]
+
+def make_key(key, ktype):
+    "Convert KEY, a Python value or a gdb.Value, to the form read_key returns for KTYPE."
+    if ktype.strip_typedefs().tag == 'QString':
+        if isinstance(key, gdb.Value):
+            if key.type.strip_typedefs().tag == 'QString':
+                return qstring_units(key)
+            key = key.string()
+        data = key.encode('utf-16-le')
+        return struct.unpack('<%dH' % (len(data) // 2), data)
+    if isinstance(key, gdb.Value):
+        if key.type.strip_typedefs().code == gdb.TYPE_CODE_FLT:
+            return float(key)
+        return int(key)
+    return key
+
 class QMapPrinter:
     "Print a QMap"
 
+    # QMap<K, V> links QMapData::Node headers, each embedded in a
+    # QMapNode<K, V> after the key and the value: { key; value;
+    # backward; forward[level + 1] }.  The header of the map itself is
+    # the QMapData d (also reachable as e), whose forward[] has the same
+    # offset as a node's.
     class _iterator:
-        def __init__(self, val):
-            self.val = val
-            self.ktype = self.val.type.template_argument(0)
-            self.vtype = self.val.type.template_argument(1)
-            self.data_node = self.val['e']['forward'][0]
-            self.count = 0
+        def __init__(self, engine, count = 0):
+            self.engine = engine
+            self.node = engine.first()
+            self.count = count
 
         def __iter__(self):
             return self
 
-        def payload (self):
-
-            #we can't use QMapPayloadNode as it's inlined
-            #as a workaround take the sum of sizeof(members)
-            ret = self.ktype.sizeof
-            ret += self.vtype.sizeof
-            ret += gdb.lookup_type('void').pointer().sizeof
-
-            #but because of data alignment the value can be higher
-            #so guess it's aliged by sizeof(void*)
-            #TODO: find a real solution for this problem
-            ret += ret % gdb.lookup_type('void').pointer().sizeof
-
-            ret -= gdb.lookup_type('void').pointer().sizeof
-            return ret
-
-        def concrete (self, data_node):
-            node_type = gdb.lookup_type('QMapNode<%s, %s>' % (self.ktype, self.vtype)).pointer()
-            return (data_node.cast(gdb.lookup_type('char').pointer()) - self.payload()).cast(node_type)
+        def seek(self, key, position):
+            "Move to element POSITION, resuming from the closest cursor remembered for KEY."
+            cursor = paging.cursors.get(key, position)
+            if cursor != None and 2 * cursor[0] >= self.count:
+                self.count = 2 * cursor[0]
+                self.node = cursor[1]
+            while self.count < 2 * position and self.node != self.engine.end:
+                self.node = self.engine.forward(self.node)
+                self.count = self.count + 2
+
+        def remember(self, key):
+            "Remember the current position as a cursor for KEY."
+            if self.count % 2 == 0 and self.node != self.engine.end:
+                paging.cursors.put(key, self.count // 2, self.node)
 
         def advance(self):
-            if self.data_node == self.val['e']:
+            if self.node == self.engine.end:
                 raise StopIteration
-            node = self.concrete(self.data_node).dereference()
             if self.count % 2 == 0:
-                item = node['key']
+                item = self.engine.key(self.node)
             else:
-                item = node['value']
-                self.data_node = node['forward'][0]
-
+                item = self.engine.value(self.node)
+                self.node = self.engine.forward(self.node)
             result = ('[%d]' % self.count, item)
             self.count = self.count + 1
             return result
@@ -191,11 +323,106 @@ class QMapPrinter:
         def __next__(self):
             return self.advance()
 
+    # Reads the skip list of one QMap with raw pointer reads.
+    class _engine:
+        def __init__(self, val):
+            self.ktype = val.type.template_argument(0)
+            self.vtype = val.type.template_argument(1)
+            self.end = int(val['e'])
+            self.d = val['d']
+            self.payload, self.key_offset, self.value_offset = QMapPrinter.node_layout(self.ktype, self.vtype)
+            self.pointer = typecache.lookup_type('void').pointer()
+            self.format = memory.scalar_format(self.pointer)
+
+        def links(self, node, level):
+            "Return the forward[0..level] links of the node or header at NODE."
+            size = self.pointer.sizeof
+            data = memory.read(node + size, (level + 1) * size)
+            return memory.decode(data, self.format, level + 1)
+
+        def forward(self, node):
+            return self.links(node, 0)[0]
+
+        def first(self):
+            return self.forward(self.end)
+
+        def key(self, node):
+            address = node - self.payload + self.key_offset
+            return gdb.Value(address).cast(self.ktype.pointer()).dereference()
+
+        def value(self, node):
+            address = node - self.payload + self.value_offset
+            return gdb.Value(address).cast(self.vtype.pointer()).dereference()
+
+        def find(self, key):
+            "Return the node holding KEY, or None; see QMap::findNode()."
+            if not comparable_key(self.ktype):
+                raise gdb.error('Cannot compare keys of type %s.' % self.ktype)
+            key = make_key(key, self.ktype)
+            read = lambda node: read_key(node - self.payload + self.key_offset, self.ktype)
+            current = self.end
+            next = self.end
+            for level in range(int(self.d['topLevel']), -1, -1):
+                while True:
+                    next = self.links(current, level)[level]
+                    if next == self.end or not read(next) < key:
+                        break
+                    current = next
+            if next != self.end and not key < read(next):
+                return next
+            return None
+
+    @staticmethod
+    def node_layout(ktype, vtype):
+        "Return (offset of backward, offset of key, offset of value) in a QMapNode<ktype, vtype>."
+        return typecache.layout('QMapNode', '%s|%s' % (ktype, vtype),
+                                lambda name: QMapPrinter.compute_layout(ktype, vtype))
+
+    @staticmethod
+    def compute_layout(ktype, vtype):
+        try:
+            nodetype = typecache.lookup_type('QMapNode<%s, %s>' % (ktype, vtype))
+            offsets = {}
+            for field in nodetype.fields():
+                offsets[field.name] = field.bitpos // 8
+            return (offsets['backward'], offsets['key'], offsets['value'])
+        except (gdb.error, KeyError):
+            pass
+
+        #QMapNode was not emitted; take the sum of sizeof(members)
+        #and guess that the links are aligned by sizeof(void*)
+        size = typecache.pointer_size()
+        value = ktype.sizeof
+        align = min(vtype.sizeof, size) or 1
+        value += -value % align
+        payload = value + vtype.sizeof
+        payload += -payload % size
+        return (payload, 0, value)
+
     def __init__(self, val):
         self.val = val
 
+    def engine(self):
+        return self._engine(self.val)
+
     def children(self):
-        return self._iterator(self.val)
+        return self._iterator(self.engine())
+
+    def children_range(self, offset, count):
+        offset, count = paging.clamp(offset, count, self.val['d']['size'])
+        key = paging.container_key(self.val, 'QMap')
+        iterator = self._iterator(self.engine())
+        iterator.seek(key, offset)
+        # Each element is a key child followed by a value child.
+        return paging.Window(iterator, 2 * count, lambda: iterator.remember(key))
+
+    def find(self, key):
+        "Return the value mapped to KEY, or None."
+        engine = self.engine()
+        node = engine.find(key)
+        if node == None:
+            return None
+        return engine.value(node)
 
     def to_string(self):
         if self.val['d']['size'] == 0:
@@ -208,54 +435,86 @@ class QMapPrinter:
     def display_hint (self):
         return 'map'
 
+def qhash(key, ktype):
+    "Return qHash (KEY) for a key converted by make_key, or None if Qt does not hash KTYPE so."
+    stripped = ktype.strip_typedefs()
+    if stripped.tag == 'QString':
+        h = 0
+        for unit in key:
+            h = (h << 4) + unit
+            h ^= (h & 0xf0000000) >> 23
+            h &= 0x0fffffff
+        return h
+    if stripped.code not in (gdb.TYPE_CODE_INT, gdb.TYPE_CODE_CHAR, gdb.TYPE_CODE_PTR):
+        return None
+    key = int(key)
+    if stripped.sizeof > 4:
+        # qHash (quint64) folds the high half in.
+        key &= 0xffffffffffffffff
+        return ((key >> 31) ^ key) & 0xffffffff
+    return key & 0xffffffff
+
 class QHashPrinter:
     "Print a QHash"
 
+    # QHash<K, V> chains QHashNode<K, V> { next; h; key; value } from
+    # each of d->buckets[0..numBuckets); every chain, and an empty
+    # bucket, ends at e, the QHashData d itself seen as a node.
     class _iterator:
-        def __init__(self, val):
-            self.val = val
-            self.ktype = self.val.type.template_argument(0)
-            self.vtype = self.val.type.template_argument(1)
-            self.bucketNum = 0
-            self.data_node = self.val['d']['buckets'][0]
-            self.end_node = self.val['d'].cast(gdb.lookup_type('QHashData::Node').pointer())
-            self.count = 0
+        def __init__(self, engine, count = 0):
+            self.engine = engine
+            self.bucket = -1
+            self.node = None
+            self.count = count
 
         def __iter__(self):
             return self
 
-        def hashNode (self):
-            "Casts the current QHashData::Node to a QHashNode and returns the result. See also QHash::concrete()"
-
-            node_type = gdb.lookup_type('QHashNode<%s, %s>' % (self.ktype, self.vtype)).pointer()
-            return self.data_node.cast(node_type)
-
-        def nextNode (self):
-            "Get the nextNode after the current, see also QHashData::nextNode()."
-
-            next = self.data_node['next']
-            if next['next']:
-                return next
-            else:
-                self.bucketNum = self.bucketNum + 1
-                return self.val['d']['buckets'][self.bucketNum]
+        def start(self):
+            if self.node == None:
+                self.node = self.engine.end
+                self.skip()
+
+        def skip(self):
+            "Move past empty buckets, locally, to the next node if there is one."
+            buckets = self.engine.buckets()
+            while self.node == self.engine.end and self.bucket + 1 < len(buckets):
+                self.bucket = self.bucket + 1
+                self.node = buckets[self.bucket]
+
+        def step(self):
+            self.node = self.engine.next(self.node)
+            self.skip()
+
+        def seek(self, key, position):
+            "Move to element POSITION, resuming from the closest cursor remembered for KEY."
+            self.start()
+            cursor = paging.cursors.get(key, position)
+            if cursor != None and 2 * cursor[0] >= self.count:
+                self.count = 2 * cursor[0]
+                self.bucket, self.node = cursor[1]
+            while self.count < 2 * position and self.node != self.engine.end:
+                self.step()
+                self.count = self.count + 2
+
+        def remember(self, key):
+            "Remember the current position as a cursor for KEY."
+            if self.count % 2 == 0 and self.node != None and self.node != self.engine.end:
+                paging.cursors.put(key, self.count // 2, (self.bucket, self.node))
 
         def advance(self):
             "GDB iteration, first call returns key, second value and then jumps to the next hash node."
-
-            if self.data_node == self.end_node:
+            self.start()
+            if self.node == self.engine.end:
                 raise StopIteration
-
-            node = self.hashNode()
-
             if self.count % 2 == 0:
-                item = node['key']
+                item = self.engine.key(self.node)
             else:
-                item = node['value']
-                self.data_node = self.nextNode()
-
+                item = self.engine.value(self.node)
+                self.step()
+            result = ('[%d]' % self.count, item)
             self.count = self.count + 1
-            return ('[%d]' % self.count, item)
+            return result
 
         def next(self):
             return self.advance()
@@ -263,11 +522,113 @@ class QHashPrinter:
         def __next__(self):
             return self.advance()
 
+    # Reads the buckets and chains of one QHash with raw reads.
+    class _engine:
+        def __init__(self, val):
+            self.ktype = val.type.template_argument(0)
+            self.vtype = val.type.template_argument(1)
+            self.d = val['d']
+            self.end = int(self.d)
+            self.bucket_list = None
+            self.key_offset, self.value_offset = QHashPrinter.node_layout(self.ktype, self.vtype)
+            self.pointer = typecache.lookup_type('void').pointer()
+            self.format = memory.scalar_format(self.pointer)
+
+        def buckets(self):
+            "Return d->buckets[0..numBuckets), read in one transfer."
+            if self.bucket_list == None:
+                count = int(self.d['numBuckets'])
+                data = memory.read(int(self.d['buckets']), count * self.pointer.sizeof)
+                self.bucket_list = memory.decode(data, self.format, count)
+            return self.bucket_list
+
+        def header(self, node):
+            "Return (next, h) of the node at NODE."
+            data = memory.read(node, self.pointer.sizeof + 4)
+            next = memory.decode(data, self.format, 1)[0]
+            return (next, memory.decode(data, 'I', 1, self.pointer.sizeof)[0])
+
+        def next(self, node):
+            return self.header(node)[0]
+
+        def key(self, node):
+            return gdb.Value(node + self.key_offset).cast(self.ktype.pointer()).dereference()
+
+        def value(self, node):
+            return gdb.Value(node + self.value_offset).cast(self.vtype.pointer()).dereference()
+
+        def find(self, key):
+            "Return the node holding KEY, or None; see QHash::findNode()."
+            if not comparable_key(self.ktype):
+                raise gdb.error('Cannot compare keys of type %s.' % self.ktype)
+            key = make_key(key, self.ktype)
+            buckets = self.buckets()
+            if not buckets:
+                return None
+            h = qhash(key, self.ktype)
+            if h == None:
+                # Not hashed the way we know; compare every key.
+                candidates = buckets
+            else:
+                candidates = [buckets[h % len(buckets)]]
+            for node in candidates:
+                while node != self.end:
+                    next, node_h = self.header(node)
+                    if (h == None or node_h == h) and read_key(node + self.key_offset, self.ktype) == key:
+                        return node
+                    node = next
+            return None
+
+    @staticmethod
+    def node_layout(ktype, vtype):
+        "Return (offset of key, offset of value) in a QHashNode<ktype, vtype>."
+        return typecache.layout('QHashNode', '%s|%s' % (ktype, vtype),
+                                lambda name: QHashPrinter.compute_layout(ktype, vtype))
+
+    @staticmethod
+    def compute_layout(ktype, vtype):
+        try:
+            nodetype = typecache.lookup_type('QHashNode<%s, %s>' % (ktype, vtype))
+            offsets = {}
+            for field in nodetype.fields():
+                offsets[field.name] = field.bitpos // 8
+            return (offsets['key'], offsets['value'])
+        except (gdb.error, KeyError):
+            pass
+
+        #QHashNode was not emitted; the key and the value follow next
+        #and h, each aligned by its size up to sizeof(void*)
+        size = typecache.pointer_size()
+        key = size + 4
+        key += -key % (min(ktype.sizeof, size) or 1)
+        value = key + ktype.sizeof
+        value += -value % (min(vtype.sizeof, size) or 1)
+        return (key, value)
+
     def __init__(self, val):
         self.val = val
 
+    def engine(self):
+        return self._engine(self.val)
+
     def children(self):
-        return self._iterator(self.val)
+        return self._iterator(self.engine())
+
+    def children_range(self, offset, count):
+        offset, count = paging.clamp(offset, count, self.val['d']['size'])
+        key = paging.container_key(self.val, 'QHash')
+        iterator = self._iterator(self.engine())
+        iterator.seek(key, offset)
+        # Each element is a key child followed by a value child.
+        return paging.Window(iterator, 2 * count, lambda: iterator.remember(key))
+
+    def find(self, key):
+        "Return the value mapped to KEY, or None."
+        engine = self.engine()
+        node = engine.find(key)
+        if node == None:
+            return None
+        return engine.value(node)
 
     def to_string(self):
         if self.val['d']['size'] == 0:
@@ -275,7 +636,7 @@ class QHashPrinter:
         else:
             empty = ""
 
-        return "%sQMap<%s, %s>" % ( empty , self.val.type.template_argument(0), self.val.type.template_argument(1) )
+        return "%sQHash<%s, %s>" % ( empty , self.val.type.template_argument(0), self.val.type.template_argument(1) )
 
     def display_hint (self):
         return 'map'
@@ -348,20 +709,17 @@ class QDateTimePrinter:
     def to_string(self):
         #val['d'] is a QDateTimePrivate, but for some reason casting to that doesn't work
         #so work around by manually adjusting the pointer
-        date = self.val['d'].cast(gdb.lookup_type('char').pointer());
-        date += gdb.lookup_type('int').sizeof #increment for QAtomicInt ref;
-        date = date.cast(gdb.lookup_type('QDate').pointer()).dereference();
+        date = self.val['d'].cast(typecache.lookup_type('char').pointer());
+        date += typecache.lookup_type('int').sizeof #increment for QAtomicInt ref;
+        date = date.cast(typecache.lookup_type('QDate').pointer()).dereference();
 
-        time = self.val['d'].cast(gdb.lookup_type('char').pointer());
-        time += gdb.lookup_type('int').sizeof + gdb.lookup_type('QDate').sizeof #increment for QAtomicInt ref; and QDate date;
-        time = time.cast(gdb.lookup_type('QTime').pointer()).dereference();
+        time = self.val['d'].cast(typecache.lookup_type('char').pointer());
+        time += typecache.lookup_type('int').sizeof + typecache.lookup_type('QDate').sizeof #increment for QAtomicInt ref; and QDate date;
+        time = time.cast(typecache.lookup_type('QTime').pointer()).dereference();
         return "%s %s" % (date, time)
 
 def register_qt4_printers (obj):
-    if obj == None:
-        obj = gdb
-
-    obj.pretty_printers.append (lookup_function)
+    registry.register (obj, 'qt4', pretty_printers_dict)
 
 def lookup_function (val):
     "Look-up and return a pretty-printer that can print val."
@@ -406,3 +764,24 @@ def build_dictionary ():
 pretty_printers_dict = {}
 
 build_dictionary ()
+
+# $qt_find (container, key) looks a key up in a QMap or a QHash.
+if hasattr(gdb, 'Function'):
+    class QtFindFunction(gdb.Function):
+        """Return the value a QMap or QHash maps to a key, without expanding the container.
+
+        Usage: print $qt_find(container, key)"""
+
+        def __init__(self):
+            super(QtFindFunction, self).__init__('qt_find')
+
+        def invoke(self, container, key):
+            printer = lookup_function(container)
+            if printer == None or not hasattr(printer, 'find'):
+                raise gdb.GdbError('$qt_find expects a QMap or a QHash, not %s.' % container.type)
+            value = printer.find(key)
+            if value == None:
+                raise gdb.GdbError('Key not found.')
+            return value
+
+    QtFindFunction()